@@ -33,9 +33,15 @@ def reload_package(module_dict_main: dict[str, Any]) -> None:
     reload_package_recursive(Path(__file__).parent, module_dict_main)
 
 
-if 'op' in locals():
+# the parser only depends on numpy, the operators are only loaded when running inside blender.
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+if bpy is not None and 'op' in locals():
     reload_package(locals())
-else:
+elif bpy is not None:
     from io_import_pskx import op
 
 
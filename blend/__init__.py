@@ -1,3 +1,4 @@
+from io_import_pskx.blend import convert
 from io_import_pskx.blend import nodes
 from io_import_pskx.blend import psa
 from io_import_pskx.blend import psk
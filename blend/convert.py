@@ -0,0 +1,10 @@
+from io_import_pskx.io import World
+from mathutils import Color, Vector
+
+
+def to_lights(world: World) -> list[tuple[int, Color, int, Vector, float, float, float, float, float, float]]:
+    return [(actor_id, Color(color), light_type, Vector(whl), attenuation, radius, temp, bias, lumens, angle) for actor_id, color, light_type, whl, attenuation, radius, temp, bias, lumens, angle in zip(world.LightActors.tolist(), world.LightColors.tolist(), world.LightTypes.tolist(), world.LightSizes.tolist(), world.LightAttenuations.tolist(), world.LightRadii.tolist(), world.LightTemperatures.tolist(), world.LightBiases.tolist(), world.LightLumens.tolist(), world.LightAngles.tolist())]
+
+
+def to_landscapes(world: World) -> list[tuple[str, int, Vector, int, int, int, int, float, Vector, Vector]]:
+    return [(name, actor_id, Vector(pos), size, type_id, x, y, bias, Vector(offset), Vector(dim)) for name, actor_id, pos, size, type_id, x, y, bias, offset, dim in world.Landscapes]
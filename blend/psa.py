@@ -1,12 +1,53 @@
 import itertools
-from os.path import basename, splitext
-from typing import Any
 
 import bpy
+import io_import_pskx.utils as utils
+import numpy
 from bpy.types import Property, Context, Object, Armature, Bone, PoseBone, FCurve, Action
 from io_import_pskx.blend.psk import ActorXMesh
-from io_import_pskx.io import read_actorx, Animation, DataType
-from mathutils import Vector, Quaternion
+from io_import_pskx.cache import load_actorx_cached
+from io_import_pskx.io import Animation, DataType, Track
+from io_import_pskx.transform import quat_canonical, quat_conjugate, quat_multiply, quat_rotate_vector
+from numpy import ndarray
+
+KEYFRAME_LINEAR: int = 1  # 'LINEAR' in the keyframe interpolation enum.
+
+
+def set_keyframes(fcurves: list[FCurve], keyframe_time: ndarray, values: ndarray):
+    keyframe_co: ndarray = numpy.empty((len(keyframe_time), 2), dtype=numpy.float32)
+    keyframe_co[:, 0] = keyframe_time
+    interpolation: ndarray = numpy.full(len(keyframe_time), KEYFRAME_LINEAR, dtype=numpy.int32)
+    for index, fcurve in enumerate(fcurves):
+        keyframe_co[:, 1] = values[:, index]
+        fcurve.keyframe_points.foreach_set('co', keyframe_co.ravel())
+        fcurve.keyframe_points.foreach_set('interpolation', interpolation)
+
+
+def get_rest_bones(armature_data: Armature) -> dict[str, tuple[Bone, ndarray, ndarray, ndarray]]:
+    # full bone name -> (bone, rest rotation, rest position, rest scale), bones are matched by their stored name
+    # so renaming them in blender doesn't matter.
+    rest: ndarray | None = None
+    if 'actorx:bind_rest' in armature_data:
+        rest = numpy.array(armature_data['actorx:bind_rest'], dtype=numpy.float32).reshape(-1, 10)
+
+    bone_map: dict[str, tuple[Bone, ndarray, ndarray, ndarray]] = {}
+    for bone in armature_data.bones:
+        if 'actorx:full_bone_name' not in bone:
+            continue
+
+        if rest is not None and 'actorx:bone_id' in bone and bone['actorx:bone_id'] < len(rest):
+            bone_rest: ndarray = rest[bone['actorx:bone_id']]
+            bone_map[bone['actorx:full_bone_name']] = (bone, bone_rest[:4], bone_rest[4:7], bone_rest[7:])
+        elif 'actorx:bind_rest_rot' in bone:
+            # armatures from older imports keep the rest pose on every bone.
+            bone_map[bone['actorx:full_bone_name']] = (bone, numpy.array(bone['actorx:bind_rest_rot'], dtype=numpy.float32), numpy.array(bone['actorx:bind_rest_pos'], dtype=numpy.float32), numpy.array(bone['actorx:bind_rest_scl'], dtype=numpy.float32))
+    return bone_map
+
+
+def log_missing_bones(names: list[str], bone_map: dict[str, tuple[Bone, ndarray, ndarray, ndarray]], armature_obj: Object):
+    missing: list[str] = [name for name in names if name not in bone_map]
+    if len(missing) > 0:
+        utils.log_warning('ACTORX', '%d bones are not in %s and are not animated: %s' % (len(missing), armature_obj.name, ', '.join(missing)))
 
 
 class ActorXAnimation:
@@ -15,15 +56,17 @@ class ActorXAnimation:
     resize_mod: float
     psa: Animation | None
     name: str
+    sequence_id: int | None  # only import this sequence, AnimationV2 defaults to the first one.
 
     def __init__(self, path: str, settings: dict[str, Property]):
         self.path = path
-        self.name = splitext(basename(path))[0]
+        self.name = utils.get_asset_name(path)
         self.settings = settings
         self.resize_mod = self.settings['resize_by']
+        self.sequence_id = self.settings['sequence_id'] if 'sequence_id' in self.settings else None
 
-        with open(self.path, 'rb') as stream:
-            self.psa = read_actorx(stream, settings)
+        # legacy scale keys are not applied.
+        self.psa = load_actorx_cached(self.path, settings, {'SCALEKEYS'})
 
     @staticmethod
     def __get_armature(context: Context) -> Object | None:
@@ -49,23 +92,34 @@ class ActorXAnimation:
 
         armature_data: Armature = armature_obj.data
 
-        bone_map: dict[str, Bone] = {bone['actorx:full_bone_name']: bone for bone in armature_data.bones}
-        bones: list[tuple[Bone, PoseBone, Vector, Vector, Quaternion]] = [None] * self.psa.NumBones
+        bone_map: dict[str, tuple[Bone, ndarray, ndarray, ndarray]] = get_rest_bones(armature_data)
+        log_missing_bones(self.psa.Bones.Names, bone_map, armature_obj)
+        bones: list[tuple[Bone, PoseBone, ndarray, ndarray, ndarray]] = [None] * self.psa.NumBones
 
         if armature_obj.animation_data is None:
             armature_obj.animation_data_create()
 
-        for bone_id, (bone_name, _, _, _, _) in enumerate(self.psa.Bones):
+        for bone_id, bone_name in enumerate(self.psa.Bones.Names):
             if bone_name not in bone_map:
                 continue
-            bone: Bone = bone_map[bone_name]
+            (bone, rot_basis, pos_basis, scl_basis) = bone_map[bone_name]
             pose_bone: PoseBone = armature_obj.pose.bones[bone.name]
-            rot_basis: Any = bone['actorx:bind_rest_rot']
-            pos_basis: Any = bone['actorx:bind_rest_pos']
-            scl_basis: Any = bone['actorx:bind_rest_scl']
-            bones[bone_id] = (bone, pose_bone, Vector(pos_basis), Vector(scl_basis), Quaternion(rot_basis))
+            bones[bone_id] = (bone, pose_bone, pos_basis, scl_basis, rot_basis)
+
+        sequence_id: int = self.sequence_id if self.sequence_id is not None else 0
+        if sequence_id >= self.psa.NumSequences:
+            utils.log_error('ACTORX', 'Sequence %d does not exist in %s!' % (sequence_id, self.path))
+            return {'CANCELLED'}
+
+        additive: bool = bool(self.psa.AdditiveModes[sequence_id])
+        action: Action = bpy.data.actions.new(name=self.psa.SequenceNames[sequence_id])
 
-        action: Action = bpy.data.actions.new(name=self.psa.SequenceName)
+        pos_track: Track = self.psa.PosTracks[sequence_id]
+        rot_track: Track = self.psa.RotTracks[sequence_id]
+        scl_track: Track = self.psa.SclTracks[sequence_id]
+        pos_key_length: ndarray = pos_track.lengths()
+        rot_key_length: ndarray = rot_track.lengths()
+        scl_key_length: ndarray = scl_track.lengths()
 
         fcurves: list[tuple[list[FCurve], list[FCurve], list[FCurve]]] = [None] * self.psa.NumBones
 
@@ -84,13 +138,13 @@ class ActorXAnimation:
             scl: list[FCurve] = [action.fcurves.new(data_path_scl, index=index) for index in range(3)]
 
             for fcurve in rot:
-                fcurve.keyframe_points.add(self.psa.RotKeyLength[bone_id])
+                fcurve.keyframe_points.add(int(rot_key_length[bone_id]))
 
             for fcurve in pos:
-                fcurve.keyframe_points.add(self.psa.PosKeyLength[bone_id])
+                fcurve.keyframe_points.add(int(pos_key_length[bone_id]))
 
             for fcurve in scl:
-                fcurve.keyframe_points.add(self.psa.SclKeyLength[bone_id])
+                fcurve.keyframe_points.add(int(scl_key_length[bone_id]))
 
             fcurves[bone_id] = (rot, pos, scl)
 
@@ -101,52 +155,39 @@ class ActorXAnimation:
             (fcurve_rot, fcurve_pos, fcurve_scl) = fcurves[bone_id]
             (bone, pose_bone, pos_basis, scl_basis, rot_basis) = bones[bone_id]
 
-            for frame_id, (keyframe_time, keyframe_rot) in enumerate(self.psa.RotKeys[bone_id]):
-                if self.psa.Additive:
-                    rot: Quaternion = keyframe_rot
-                else:
-                    rot: Quaternion = rot_basis.conjugated()
-                    rot.rotate(rot_basis)
-
-                    rot_parent: Quaternion = rot_basis.conjugated()
-                    if bone.parent is not None:
-                        rot_parent.rotate(keyframe_rot)
-                    else:
-                        rot_parent.rotate(keyframe_rot.conjugated())
-
-                    rot.rotate(rot_parent)
-                    rot.conjugate()
-
-                for i in range(4):
-                    fcurve_rot[i].keyframe_points[frame_id].co = keyframe_time + 1, rot[i]
-                    fcurve_rot[i].keyframe_points[frame_id].interpolation = 'LINEAR'
-
-            for frame_id, (keyframe_time, keyframe_pos) in enumerate(self.psa.PosKeys[bone_id]):
-                if self.psa.Additive:
-                    pos: Vector = keyframe_pos
-                else:
-                    pos: Vector = keyframe_pos - pos_basis
-                    pos.rotate(rot_basis)
-
-                for i in range(3):
-                    fcurve_pos[i].keyframe_points[frame_id].co = keyframe_time + 1, pos[i]
-                    fcurve_pos[i].keyframe_points[frame_id].interpolation = 'LINEAR'
-
-            for frame_id, (keyframe_time, keyframe_scl) in enumerate(self.psa.SclKeys[bone_id]):
-                if self.psa.Additive:
-                    scl: Vector = keyframe_scl * self.psa.ResizeBy
-                else:
-                    scl: Vector = keyframe_scl - scl_basis
-
-                for i in range(3):
-                    fcurve_scl[i].keyframe_points[frame_id].co = keyframe_time + 1, scl[i]
-                    fcurve_scl[i].keyframe_points[frame_id].interpolation = 'LINEAR'
+            (keyframe_time, keyframe_rot) = rot_track[bone_id]
+            if additive:
+                rot: ndarray = keyframe_rot
+            else:
+                if bone.parent is None:
+                    keyframe_rot = quat_conjugate(keyframe_rot)
+                rot: ndarray = quat_conjugate(quat_canonical(quat_multiply(keyframe_rot, quat_conjugate(rot_basis))))
+
+            set_keyframes(fcurve_rot, keyframe_time + 1, rot)
+
+            (keyframe_time, keyframe_pos) = pos_track[bone_id]
+            if additive:
+                pos: ndarray = keyframe_pos
+            else:
+                pos: ndarray = quat_rotate_vector(rot_basis, keyframe_pos - pos_basis)
+
+            set_keyframes(fcurve_pos, keyframe_time + 1, pos)
+
+            (keyframe_time, keyframe_scl) = scl_track[bone_id]
+            if additive:
+                scl: ndarray = keyframe_scl * self.psa.ResizeBy
+            else:
+                scl: ndarray = keyframe_scl - scl_basis
+
+            set_keyframes(fcurve_scl, keyframe_time + 1, scl)
 
         # action.asset_mark()
         # action.asset_data.tags.new(name='actorx', skip_if_exists=True)
         # action.asset_data.tags.new(name='sequence', skip_if_exists=True)
         armature_obj.animation_data.action = action
 
+        self.psa.release()
+
         return {'FINISHED'}
 
     def execute_legacy(self, context: Context):
@@ -156,23 +197,25 @@ class ActorXAnimation:
 
         armature_data: Armature = armature_obj.data
 
-        bone_map: dict[str, Bone] = {bone['actorx:full_bone_name']: bone for bone in armature_data.bones}
-        bones: list[tuple[Bone, PoseBone, Vector, Quaternion]] = [None] * self.psa.NumBones
+        bone_map: dict[str, tuple[Bone, ndarray, ndarray, ndarray]] = get_rest_bones(armature_data)
+        log_missing_bones(self.psa.Bones.Names, bone_map, armature_obj)
+        bones: list[tuple[Bone, PoseBone, ndarray, ndarray]] = [None] * self.psa.NumBones
 
         if armature_obj.animation_data is None:
             armature_obj.animation_data_create()
 
-        for bone_id, (bone_name, _, _, _, _) in enumerate(self.psa.Bones):
+        for bone_id, bone_name in enumerate(self.psa.Bones.Names):
             if bone_name not in bone_map:
                 continue
-            bone: Bone = bone_map[bone_name]
+            (bone, rot_basis, pos_basis, _) = bone_map[bone_name]
             pose_bone: PoseBone = armature_obj.pose.bones[bone.name]
-            rot_basis: Any = bone['actorx:bind_rest_rot']
-            pos_basis: Any = bone['actorx:bind_rest_pos']
-            bones[bone_id] = (bone, pose_bone, Vector(pos_basis), Quaternion(rot_basis))
+            bones[bone_id] = (bone, pose_bone, pos_basis, rot_basis)
 
         base_action: Action = None
         for sequence_id, (name, group, total_bones, frame_count, frame_rate) in enumerate(self.psa.Sequences):
+            if self.sequence_id is not None and sequence_id != self.sequence_id:
+                continue
+
             if group != 'None':
                 name = '%s: %s' % (group, name)
 
@@ -180,63 +223,39 @@ class ActorXAnimation:
             if base_action is None:
                 base_action = action
 
-            fcurves: list[tuple[list[FCurve], list[FCurve]]] = [None] * total_bones
+            sequence_keys: ndarray = self.psa.SequenceKeys[sequence_id]
+            sequence_times: ndarray = self.psa.SequenceTimes[sequence_id]
 
-            for bone_id in range(total_bones):
+            for bone_id in range(min(total_bones, self.psa.NumBones)):
                 if bones[bone_id] is None:
                     continue
 
-                (_, pose_bone, _, _) = bones[bone_id]
+                (bone, pose_bone, pos_basis, rot_basis) = bones[bone_id]
 
                 data_path_rot: str = pose_bone.path_from_id('rotation_quaternion')
                 data_path_pos: str = pose_bone.path_from_id('location')
 
-                rot: list[FCurve] = [action.fcurves.new(data_path_rot, index=index) for index in range(4)]
-                pos: list[FCurve] = [action.fcurves.new(data_path_pos, index=index) for index in range(3)]
+                fcurve_rot: list[FCurve] = [action.fcurves.new(data_path_rot, index=index) for index in range(4)]
+                fcurve_pos: list[FCurve] = [action.fcurves.new(data_path_pos, index=index) for index in range(3)]
 
-                for fcurve in itertools.chain(rot, pos):
+                for fcurve in itertools.chain(fcurve_rot, fcurve_pos):
                     fcurve.keyframe_points.add(frame_count)
 
-                fcurves[bone_id] = (rot, pos)
-
-            keyframe_time: list[float] = [1.0] * total_bones
-
-            for frame_id in range(frame_count):
-                frame_offset: int = total_bones * frame_id
-                for bone_id in range(total_bones):
-                    if fcurves[bone_id] is None:
-                        continue
+                keyframe_pos: ndarray = sequence_keys[:, bone_id, :3]
+                keyframe_rot: ndarray = sequence_keys[:, bone_id, 3:]
+                keyframe_time: ndarray = sequence_times[:, bone_id]
 
-                    (fcurve_rot, fcurve_pos) = fcurves[bone_id]
-                    (bone, pose_bone, pos_basis, rot_basis) = bones[bone_id]
-                    (keyframe_duration, keyframe_pos, keyframe_rot) = self.psa.Keys[frame_offset + bone_id]
+                if bone.parent is None:
+                    keyframe_rot = quat_conjugate(keyframe_rot)
+                rot: ndarray = quat_conjugate(quat_canonical(quat_multiply(keyframe_rot, quat_conjugate(rot_basis))))
+                pos: ndarray = quat_rotate_vector(rot_basis, keyframe_pos - pos_basis)
 
-                    rot: Quaternion = rot_basis.conjugated()
-                    rot.rotate(rot_basis)
-
-                    rot_parent: Quaternion = rot_basis.conjugated()
-                    if bone.parent is not None:
-                        rot_parent.rotate(keyframe_rot)
-                    else:
-                        rot_parent.rotate(keyframe_rot.conjugated())
-
-                    rot.rotate(rot_parent)
-                    rot.conjugate()
-
-                    pos: Vector = keyframe_pos - pos_basis
-                    pos.rotate(rot_basis)
-
-                    for i in range(4):
-                        fcurve_rot[i].keyframe_points[frame_id].co = keyframe_time[bone_id], rot[i]
-                        fcurve_rot[i].keyframe_points[frame_id].interpolation = 'LINEAR'
-
-                    for i in range(3):
-                        fcurve_pos[i].keyframe_points[frame_id].co = keyframe_time[bone_id], pos[i]
-                        fcurve_pos[i].keyframe_points[frame_id].interpolation = 'LINEAR'
-
-                    keyframe_time[bone_id] += keyframe_duration
+                set_keyframes(fcurve_rot, keyframe_time, rot)
+                set_keyframes(fcurve_pos, keyframe_time, pos)
 
         if base_action is not None:
             armature_obj.animation_data.action = base_action
 
+        self.psa.release()
+
         return {'FINISHED'}
@@ -1,12 +1,19 @@
-import itertools
-from os.path import basename, splitext
-
 import bpy.types
 import io_import_pskx.utils as utils
 import numpy
-from bpy.types import Property, Context, Armature, Object, EditBone, MeshUVLoopLayer, MeshLoopColorLayer, VertexGroup, ArmatureModifier, ShapeKey
-from io_import_pskx.io import read_actorx, Mesh, DataType
-from mathutils import Quaternion, Vector, Matrix
+from bpy.types import Property, Context, Armature, Object, EditBone, MeshUVLoopLayer, ByteColorAttribute, VertexGroup, ArmatureModifier, ShapeKey
+from io_import_pskx.cache import load_actorx_cached
+from io_import_pskx.io import Mesh, DataType, Skeleton
+from io_import_pskx.pack import ActorXPack
+from io_import_pskx.transform import compose_matrices, matrix_to_bone, quat_conjugate, resolve_hierarchy
+from numpy import ndarray
+
+
+def get_bone_name(bone_name: str, bone_id: int) -> str:
+    # blender names are limited to 63 bytes, long names keep their bone id to stay unique.
+    if len(bone_name) > 63:
+        return '%s:%d' % (bone_name[:57], bone_id)
+    return bone_name
 
 
 class ActorXMesh:
@@ -15,22 +22,39 @@ class ActorXMesh:
     resize_mod: float
     psk: Mesh | None
     override_materials: dict[int, str]
+    reimport_selected: bool
     name: str
 
-    def __init__(self, path: str, settings: dict[str, Property]):
+    def __init__(self, path: str, settings: dict[str, Property], pack: ActorXPack | None = None):
         self.path = path
-        self.name = splitext(basename(path))[0]
+        self.name = utils.get_asset_name(path)
         self.settings = settings
         self.resize_mod = self.settings['resize_by']
         self.override_materials = self.settings['override_materials'] if 'override_materials' in self.settings else {}
+        self.reimport_selected = self.settings['reimport_selected'] if 'reimport_selected' in self.settings else False
 
-        with open(self.path, 'rb') as stream:
-            self.psk = read_actorx(stream, settings)
+        if pack is not None:
+            self.psk = pack.load(self.path, settings, self.get_skip_chunks(settings))
+        else:
+            self.psk = load_actorx_cached(self.path, settings, self.get_skip_chunks(settings))
+
+    @staticmethod
+    def get_skip_chunks(settings: dict[str, Property]) -> set[str]:
+        # tangents are never consumed, blender computes its own.
+        skip_chunks: set[str] = {'VTXTANGS'}
+        if 'import_extra_uvs' in settings and not settings['import_extra_uvs']:
+            skip_chunks.add('EXTRAUVS')
+        if 'import_morphs' in settings and not settings['import_morphs']:
+            skip_chunks.update(('MORPHTARGET', 'MORPHNAMES'))
+        return skip_chunks
 
     def execute(self, context: Context) -> set[str]:
         if self.psk is None or self.psk.TYPE != DataType.Mesh:
             return {'CANCELLED'}
 
+        if self.reimport_selected:
+            return self.reimport(context)
+
         mesh_data: Mesh = bpy.data.meshes.new(self.name)
         mesh_obj: Object = bpy.data.objects.new(mesh_data.name, mesh_data)
         context.view_layer.active_layer_collection.collection.objects.link(mesh_obj)
@@ -41,63 +65,20 @@ class ActorXMesh:
 
         has_sockets: bool = self.psk.Sockets is not None and has_armature
 
-        for material_id, material_name in enumerate(self.psk.MaterialNames):
-            if material_id in self.override_materials:
-                material_name = self.override_materials[material_id]
-            material_data = bpy.data.materials.get(material_name) or bpy.data.materials.new(material_name)
-            material_data.use_nodes = True
-            mesh_data.materials.append(material_data)
+        self.import_materials(mesh_data)
 
         if has_armature:
-            vertex_groups: list[VertexGroup] = [None] * len(self.psk.Bones)
             (armature_data, armature_obj) = self.import_armature(context, self.name, self.psk.Bones)
 
-            for bone_id, (bone_name, _, _, _, _) in enumerate(self.psk.Bones):
-                if len(bone_name) > 63:
-                    bone_name = '%s:%d' % (bone_name[:57], bone_id)
-                vertex_groups[bone_id] = mesh_obj.vertex_groups.new(name=bone_name)
-
             mesh_obj.parent = armature_obj
             mesh_obj.parent_type = 'OBJECT'
 
-        mesh_data.from_pydata(self.psk.Vertices, [], self.psk.Faces)
-
-        mesh_data.polygons.foreach_set('material_index', self.psk.Materials)
-
-        if self.psk.Normals is not None:
-            mesh_data.polygons.foreach_set('use_smooth', numpy.full(self.psk.NumFaces, True))
-            mesh_data.normals_split_custom_set_from_vertices(self.psk.Normals)
-
-        if self.psk.Colors is not None:
-            color_layer: MeshLoopColorLayer = mesh_data.vertex_colors.new(name='Color', do_init=False)
-            color_layer.data.foreach_set('color', list(itertools.chain.from_iterable(self.psk.Colors)))
-
-        for uv_id, uv_data in enumerate(self.psk.UVs):
-            name: str = 'UV' if uv_id == 0 else 'UV_%03d' % uv_id
-            uv_layer: MeshUVLoopLayer = mesh_data.uv_layers.new(name=name)
-            if uv_layer is None:
-                break
-
-            uv_layer.data.foreach_set('uv', list(itertools.chain.from_iterable(uv_data)))
-
-        if self.psk.NumShapes > 0:
-            shape_basis: ShapeKey = mesh_obj.shape_key_add(name='Basis', from_mix=False)
-            shape_basis.interpolation = 'KEY_LINEAR'
-            mesh_data.shape_keys.use_relative = True
-
-            for shape_name, shape_data in self.psk.ShapeKeys.items():
-                shape = mesh_obj.shape_key_add(name=shape_name, from_mix=False)
-                shape.interpolation = 'KEY_LINEAR'
-                shape.relative_key = shape_basis
-                shape.data.foreach_set('co', list(itertools.chain.from_iterable(shape_data)))
-
-        mesh_data.validate()
-        mesh_data.update()
+        self.build_mesh(mesh_data)
+        self.import_shape_keys(mesh_obj)
+        self.finish_mesh(mesh_data)
 
         if has_armature:
-            if self.psk.Weights is not None:
-                for weight, vertex_id, bone_id in self.psk.Weights:
-                    vertex_groups[bone_id].add((vertex_id,), weight, 'ADD')
+            self.import_weights(mesh_obj)
 
             armature_modifier: ArmatureModifier = mesh_obj.modifiers.new(armature_obj.data.name, type='ARMATURE')
             armature_modifier.show_expanded = False
@@ -115,10 +96,178 @@ class ActorXMesh:
         #     mesh_obj.asset_data.tags.new(name='skinned', skip_if_exists=True)
         # mesh_obj.asset_generate_preview()
 
+        # the blender data is built, the raw chunks are no longer needed.
+        self.psk.release()
+
+        return {'FINISHED'}
+
+    def reimport(self, context: Context) -> set[str]:
+        mesh_obj: Object | None = context.active_object
+        if mesh_obj is None or mesh_obj.type != 'MESH':
+            utils.log_error('ACTORX', 'Select the mesh to reimport %s into!' % (self.path))
+            return {'CANCELLED'}
+
+        mesh_data: bpy.types.Mesh = mesh_obj.data
+        if self.has_same_topology(mesh_data):
+            # the mesh keeps its datablock and everything referencing it, only the per element data is rewritten.
+            mesh_data.vertices.foreach_set('co', numpy.ascontiguousarray(self.psk.Vertices, dtype=numpy.float32).ravel())
+            self.import_materials(mesh_data)
+            self.import_attributes(mesh_data)
+        else:
+            utils.log_info('ACTORX', 'Topology of %s changed, rebuilding %s' % (self.name, mesh_data.name))
+            old_data: bpy.types.Mesh = mesh_data
+            mesh_name: str = old_data.name
+            mesh_data = bpy.data.meshes.new(mesh_name)
+            for material in old_data.materials:
+                mesh_data.materials.append(material)
+            self.import_materials(mesh_data)
+            self.build_mesh(mesh_data)
+
+            mesh_obj.data = mesh_data
+            # vertex groups index the vertices of the old mesh.
+            mesh_obj.vertex_groups.clear()
+            if old_data.users == 0:
+                bpy.data.meshes.remove(old_data)
+                mesh_data.name = mesh_name
+
+        self.import_shape_keys(mesh_obj)
+        self.finish_mesh(mesh_data)
+
+        if self.psk.Bones is not None:
+            self.import_weights(mesh_obj)
+
+        self.psk.release()
+
         return {'FINISHED'}
 
+    def has_same_topology(self, mesh_data: bpy.types.Mesh) -> bool:
+        if len(mesh_data.vertices) != self.psk.NumVertices or len(mesh_data.polygons) != self.psk.NumFaces or len(mesh_data.loops) != self.psk.NumFaces * 3:
+            return False
+
+        loops: ndarray = numpy.empty(len(mesh_data.loops), dtype=numpy.int32)
+        mesh_data.loops.foreach_get('vertex_index', loops)
+        return numpy.array_equal(loops, self.psk.Faces.ravel())
+
+    def import_materials(self, mesh_data: bpy.types.Mesh):
+        # slots the mesh already has are left alone, so reimports keep materials assigned by hand.
+        material_names: list[str] = self.psk.MaterialNames or []
+        for material_id in range(len(mesh_data.materials), len(material_names)):
+            material_name = material_names[material_id]
+            if material_id in self.override_materials:
+                material_name = self.override_materials[material_id]
+            material_data = bpy.data.materials.get(material_name) or bpy.data.materials.new(material_name)
+            material_data.use_nodes = True
+            mesh_data.materials.append(material_data)
+
+    def import_shape_keys(self, mesh_obj: Object):
+        mesh_data: bpy.types.Mesh = mesh_obj.data
+        if mesh_data.shape_keys is not None and self.psk.NumShapes == 0:
+            # the reimported file has no morphs left.
+            mesh_obj.shape_key_clear()
+            return
+
+        if mesh_data.shape_keys is None:
+            if self.psk.NumShapes == 0:
+                return
+
+            shape_basis: ShapeKey = mesh_obj.shape_key_add(name='Basis', from_mix=False)
+            shape_basis.interpolation = 'KEY_LINEAR'
+            mesh_data.shape_keys.use_relative = True
+        else:
+            # the basis overrides the vertex positions, so it follows them on reimport.
+            shape_basis: ShapeKey = mesh_data.shape_keys.reference_key
+            shape_basis.data.foreach_set('co', numpy.ascontiguousarray(self.psk.Vertices, dtype=numpy.float32).ravel())
+            # keys the file no longer has are removed, so the mesh never mixes morphs from two exports.
+            for shape in list(mesh_data.shape_keys.key_blocks):
+                if shape.name != shape_basis.name and shape.name not in self.psk.ShapeKeys:
+                    mesh_obj.shape_key_remove(shape)
+
+        shape_buffer: ndarray = numpy.empty((self.psk.NumVertices, 3), dtype=numpy.float32)
+        for shape_name in self.psk.ShapeKeys.keys():
+            shape: ShapeKey | None = mesh_data.shape_keys.key_blocks.get(shape_name)
+            if shape is None:
+                shape = mesh_obj.shape_key_add(name=shape_name, from_mix=False)
+                shape.interpolation = 'KEY_LINEAR'
+                shape.relative_key = shape_basis
+            shape.data.foreach_set('co', self.psk.expand_shape_key(shape_name, shape_buffer).ravel())
+
+    def finish_mesh(self, mesh_data: bpy.types.Mesh):
+        # finalize already dropped whatever validate would, it only runs as a safety net after repairs.
+        if len(self.psk.Repairs) > 0:
+            utils.log_warning('ACTORX', 'Repaired %s: %s' % (self.name, ', '.join(self.psk.Repairs)))
+            mesh_data.validate()
+        mesh_data.update()
+
+    def import_weights(self, mesh_obj: Object):
+        # groups are only created for bones that have weights, duplicate records are already summed.
+        # groups left from an earlier import are emptied first, bones can lose weights between exports.
+        all_vertices: list[int] = list(range(len(mesh_obj.data.vertices)))
+        vertex_groups: dict[int, VertexGroup] = {}
+        for bone_id in range(self.psk.NumBones):
+            vertex_group: VertexGroup | None = mesh_obj.vertex_groups.get(get_bone_name(self.psk.Bones.Names[bone_id], bone_id))
+            if vertex_group is not None:
+                vertex_group.remove(all_vertices)
+                vertex_groups[bone_id] = vertex_group
+
+        for bone_id, weight, vertex_ids in self.psk.get_weight_groups():
+            if bone_id not in vertex_groups:
+                vertex_groups[bone_id] = mesh_obj.vertex_groups.new(name=get_bone_name(self.psk.Bones.Names[bone_id], bone_id))
+
+            vertex_groups[bone_id].add(vertex_ids.tolist(), weight, 'REPLACE')
+
+    def build_mesh(self, mesh_data: bpy.types.Mesh):
+        # every buffer goes straight from numpy into the mesh, no per element python objects are created.
+        num_loops: int = self.psk.NumFaces * 3
+
+        mesh_data.vertices.add(len(self.psk.Vertices))
+        mesh_data.vertices.foreach_set('co', numpy.ascontiguousarray(self.psk.Vertices, dtype=numpy.float32).ravel())
+
+        mesh_data.loops.add(num_loops)
+        mesh_data.loops.foreach_set('vertex_index', numpy.ascontiguousarray(self.psk.Faces, dtype=numpy.int32).ravel())
+
+        mesh_data.polygons.add(self.psk.NumFaces)
+        mesh_data.polygons.foreach_set('loop_start', numpy.arange(0, num_loops, 3, dtype=numpy.int32))
+        if not mesh_data.polygons.bl_rna.properties['loop_total'].is_readonly:
+            # newer versions derive the loop count from the loop starts.
+            mesh_data.polygons.foreach_set('loop_total', numpy.full(self.psk.NumFaces, 3, dtype=numpy.int32))
+
+        mesh_data.update(calc_edges=True)
+
+        self.import_attributes(mesh_data)
+
+    def import_attributes(self, mesh_data: bpy.types.Mesh):
+        # writes every per face and per corner attribute, existing layers are reused so this also serves reimports.
+        if self.psk.Materials is not None:
+            mesh_data.polygons.foreach_set('material_index', numpy.ascontiguousarray(self.psk.Materials, dtype=numpy.int32))
+
+        if self.psk.Normals is not None:
+            mesh_data.polygons.foreach_set('use_smooth', numpy.ones(self.psk.NumFaces, dtype=bool))
+            if self.psk.Welded:
+                mesh_data.normals_split_custom_set(numpy.ascontiguousarray(self.psk.Normals, dtype=numpy.float32))
+            else:
+                mesh_data.normals_split_custom_set_from_vertices(numpy.ascontiguousarray(self.psk.Normals, dtype=numpy.float32))
+
+        if self.psk.Colors is not None:
+            color_domain: str = 'CORNER' if self.psk.CornerColors else 'POINT'
+            color_attribute: ByteColorAttribute | None = mesh_data.color_attributes.get('Color')
+            if color_attribute is not None and (color_attribute.data_type != 'BYTE_COLOR' or color_attribute.domain != color_domain):
+                mesh_data.color_attributes.remove(color_attribute)
+                color_attribute = None
+            if color_attribute is None:
+                color_attribute = mesh_data.color_attributes.new(name='Color', type='BYTE_COLOR', domain=color_domain)
+            # rna only takes floats, color_srgb maps them back onto the same bytes.
+            color_attribute.data.foreach_set('color_srgb', numpy.multiply(self.psk.Colors, numpy.float32(1.0 / 0xff), dtype=numpy.float32).ravel())
+
+        for uv_id, uv_data in enumerate(self.psk.UVs):
+            name: str = 'UV' if uv_id == 0 else 'UV_%03d' % uv_id
+            uv_layer: MeshUVLoopLayer | None = mesh_data.uv_layers.get(name) or mesh_data.uv_layers.new(name=name, do_init=False)
+            if uv_layer is None:
+                break
+
+            uv_layer.data.foreach_set('uv', numpy.ascontiguousarray(uv_data, dtype=numpy.float32).ravel())
+
     @staticmethod
-    def import_armature(context: Context, name: str, bones: list[tuple[str, int, Quaternion, Vector, Vector]]) -> set[Armature, Object]:
+    def import_armature(context: Context, name: str, skeleton: Skeleton) -> tuple[Armature, Object]:
         armature_data: Armature = bpy.data.armatures.new(name + ' Armature')
         armature_obj: Object = bpy.data.objects.new(armature_data.name, armature_data)
         context.view_layer.active_layer_collection.collection.objects.link(armature_obj)
@@ -127,36 +276,34 @@ class ActorXMesh:
         armature_data.display_type = 'STICK'
         armature_obj.show_in_front = True
 
+        # root rotations are stored conjugated, the bind pose is resolved for every bone at once.
+        rest_rot: ndarray = skeleton.Rotations.copy()
+        roots: ndarray = skeleton.Parents < 0
+        rest_rot[roots] = quat_conjugate(rest_rot[roots])
+        bone_matrices: ndarray = resolve_hierarchy(skeleton.Parents, compose_matrices(skeleton.Positions, quat_conjugate(rest_rot), numpy.ones((skeleton.NumBones, 3))))
+        (heads, tails, rolls) = matrix_to_bone(bone_matrices, 0.001)
+
         context.view_layer.objects.active = armature_obj
         bpy.ops.object.mode_set(mode='EDIT', toggle=False)
 
-        edit_bones: list[EditBone] = [None] * len(bones)
-        bone_matrices: List[Matrix] = [None] * len(bones)
-
-        for bone_id, (bone_name, parent_id, bone_rot, bone_pos, bone_scale) in enumerate(bones):
-            orig_bone_name: str = bone_name
-            if len(bone_name) > 63:
-                bone_name = '%s:%d' % (bone_name[:57], bone_id)
-            edit_bone: EditBone = armature_data.edit_bones.new(bone_name)
+        edit_bones: list[EditBone] = [None] * skeleton.NumBones
+        for bone_id, bone_name in enumerate(skeleton.Names):
+            edit_bone: EditBone = armature_data.edit_bones.new(get_bone_name(bone_name, bone_id))
+            # the bone finds its psk name and bind pose through these even after it is renamed.
+            edit_bone['actorx:full_bone_name'] = bone_name
+            edit_bone['actorx:bone_id'] = bone_id
             edit_bones[bone_id] = edit_bone
-            edit_bone['actorx:full_bone_name'] = orig_bone_name
-            edit_bone.tail = Vector((0.0, 0.001, 0.0))
-
-            if parent_id == -1:
-                bone_rot.conjugate()
-
-            bone_matrix: Matrix = Matrix.Translation(bone_pos) @ bone_rot.conjugated().to_matrix().to_4x4()
 
-            if parent_id > -1:
-                edit_bone.parent = edit_bones[parent_id]
-                bone_matrix = bone_matrices[parent_id] @ bone_matrix
+        for bone_id, parent_id in enumerate(skeleton.Parents.tolist()):
+            if 0 <= parent_id < skeleton.NumBones and parent_id != bone_id:
+                edit_bones[bone_id].parent = edit_bones[parent_id]
 
-            bone_matrices[bone_id] = bone_matrix
-            edit_bone.matrix = bone_matrix
+        armature_data.edit_bones.foreach_set('head', heads.astype(numpy.float32).ravel())
+        armature_data.edit_bones.foreach_set('tail', tails.astype(numpy.float32).ravel())
+        armature_data.edit_bones.foreach_set('roll', rolls.astype(numpy.float32))
 
-            edit_bone['actorx:bind_rest_rot'] = bone_rot.copy()
-            edit_bone['actorx:bind_rest_pos'] = bone_pos.copy()
-            edit_bone['actorx:bind_rest_scl'] = bone_scale.copy()
+        # bind pose of every psk bone, indexed by actorx:bone_id.
+        armature_data['actorx:bind_rest'] = numpy.concatenate((rest_rot, skeleton.Positions, skeleton.Scales), axis=1).ravel().tolist()
 
         bpy.ops.object.mode_set(mode='OBJECT', toggle=False)
 
@@ -4,10 +4,14 @@ from os.path import join as join_path
 import numpy
 import bpy.types
 import io_import_pskx.utils as utils
-from bpy.types import Property, Context, Collection, Mesh, Object, NodesModifier, GeometryNodeTree, NodeGroupOutput, GeometryNodeGroup, Image, Material, ShaderNodeTexCoord, ShaderNodeSeparateXYZ, NodeReroute, ShaderNodeTexImage
-from mathutils import Quaternion, Vector, Color
-from io_import_pskx.io import read_actorx, World, DataType
+from bpy.types import Property, Context, Collection, LayerCollection, Mesh, Object, NodesModifier, GeometryNodeTree, NodeGroupOutput, GeometryNodeGroup, Image, Material, ShaderNodeTexCoord, ShaderNodeSeparateXYZ, NodeReroute, ShaderNodeTexImage
+from mathutils import Matrix, Quaternion, Vector, Color
+from io_import_pskx.cache import load_actorx_cached
+from io_import_pskx.io import World, DataType
+from io_import_pskx.blend.convert import to_landscapes, to_lights
 from io_import_pskx.blend.psk import ActorXMesh
+from io_import_pskx.pack import ActorXPack
+from io_import_pskx.world import WorldPlan
 from io_import_pskx.utils import log_error, log_warning, log_info
 
 enable_ueformat = False
@@ -20,25 +24,6 @@ except:
     log_error('WORLD', "failed to load ue_format")
     pass
 
-ignore_names = ['CUBE', 'SPHERE', 'CONE', 'CYLINDER', 'CAPSULE', 'BOX', 'ARROW', 'SPLINE', 'PLANE']
-
-
-def is_ignored_name(path: str) -> bool:
-    test = basename(path).split('.')[0].upper()
-    if test.startswith('SM_'):
-        test = test[3:]
-    elif test.startswith('SHAPE_'):
-        test = test[6:]
-    elif test.startswith('1M_'):
-        test = test[3:].split('_')[0]
-    if 'VFX_' in test: return True
-    return test in ignore_names
-
-
-def is_lodactor_or_hlod(path: str) -> bool:
-    test = basename(path).split('.')[0].upper()
-    return 'LODACTOR_' in test or '_HLOD_' in test
-
 
 def convert_temperature(temperature: float) -> Color:
     temperature = numpy.clip(temperature, 1000, 40000)
@@ -65,6 +50,19 @@ def convert_temperature(temperature: float) -> Color:
     return Color((rgb[0], rgb[1], rgb[2]))
 
 
+def find_psk(path: str, pack: ActorXPack | None = None) -> str | None:
+    # try psk before pskx, and uncompressed files before compressed ones.
+    for extension in ('.psk', '.pskx'):
+        for compressed_extension in ('',) + utils.compressed_extensions:
+            psk_path = path + extension + compressed_extension
+            if pack is not None:
+                if psk_path in pack:
+                    return psk_path
+            elif exists(psk_path):
+                return psk_path
+    return None
+
+
 def undeduplicate_name(name: str) -> str:
     if len(name) < 4:
         return name
@@ -84,8 +82,11 @@ class ActorXWorld:
     no_static_instances: bool
     no_skeletons: bool
     ignore_shapes: bool
+    flatten_hierarchy: bool
+    import_instance_morphs: bool
     game_dir: str
     psw: World | None
+    pack: ActorXPack | None
     name: str
 
     def __init__(self, path: str, settings: dict[str, Property]):
@@ -108,15 +109,77 @@ class ActorXWorld:
         self.import_light = self.settings['import_light']
         self.ignore_shapes = self.settings['ignore_shapes']
         self.ignore_lodactors = self.settings['ignore_lodactors']
-
-        with open(self.path, 'rb') as stream:
-            self.psw = read_actorx(stream, settings)
+        self.flatten_hierarchy = self.settings['flatten_hierarchy'] if 'flatten_hierarchy' in self.settings else False
+        self.import_instance_morphs = self.settings['import_instance_morphs'] if 'import_instance_morphs' in self.settings else True
+
+        self.psw = load_actorx_cached(self.path, settings, self.get_skip_chunks(settings))
+
+        self.pack = None
+        if 'asset_pack' in self.settings and len(self.settings['asset_pack']) > 0:
+            self.pack = ActorXPack(self.settings['asset_pack'])
+            log_info('WORLD', 'reading %d assets from %s' % (len(self.pack), self.settings['asset_pack']))
+
+    @staticmethod
+    def get_skip_chunks(settings: dict[str, Property]) -> set[str]:
+        skip_chunks: set[str] = set()
+        if not settings['import_mesh']:
+            skip_chunks.add('INSTMATERIAL')
+        if not settings['import_landscape']:
+            skip_chunks.add('LANDSCAPE')
+        if not settings['import_light']:
+            skip_chunks.add('WORLDLIGHTS')
+        return skip_chunks
+
+    @staticmethod
+    def get_result_path(plan: WorldPlan, asset_id: int) -> str:
+        result_path = plan.AssetPaths[asset_id]
+        if sep != '/':
+            result_path = result_path.replace('/', sep)
+        return result_path
+
+    def import_asset(self, context: Context, plan: WorldPlan, asset_id: int, actor_collection: Collection, actor_layer: LayerCollection) -> Collection | None:
+        result_path = self.get_result_path(plan, asset_id)
+
+        if enable_ueformat:
+            uemodel_path = normpath(join_path(self.game_dir, result_path + '.uemodel'))
+            if not exists(uemodel_path):
+                return None
+
+            import_settings = UEModelOptions(link=True, scale_factor=self.resize_mod, bone_length=5, reorient_bones=False)
+            mesh_obj = bpy.data.collections.new(self.psw.ActorNames[plan.AssetFirstActor[asset_id]])
+            actor_collection.children.link(mesh_obj)
+            context.view_layer.active_layer_collection = actor_layer.children[-1]
+            uemodel_obj = UEFormatImport(import_settings).import_file(uemodel_path)
+            mesh_obj.name = undeduplicate_name(uemodel_obj.name)
+            return mesh_obj
+
+        if self.pack is not None:
+            psk_path = find_psk(result_path, self.pack)
+        else:
+            psk_path = find_psk(normpath(join_path(self.game_dir, result_path)))
+
+        if psk_path is None:
+            log_error('WORLD', 'Can\'t find asset %s' % result_path)
+            return None
+
+        log_info('WORLD', "importing model %s" % (psk_path))
+        import_settings = self.settings.copy()
+        import_settings['override_materials'] = dict(plan.AssetOverrides[asset_id])
+        import_settings['import_morphs'] = self.import_instance_morphs
+        psk = ActorXMesh(psk_path, import_settings, self.pack)
+        mesh_obj = bpy.data.collections.new(psk.name)
+        actor_collection.children.link(mesh_obj)
+        context.view_layer.active_layer_collection = actor_layer.children[-1]
+        psk.execute(context)
+        return mesh_obj
 
     def execute(self, context: Context) -> set[str]:
         if self.psw is None or self.psw.TYPE != DataType.World:
             return {'CANCELLED'}
 
-        if len(self.game_dir) == 0:
+        # assets come from the pack when there is one, the game directory is only needed without it.
+        if len(self.game_dir) == 0 and self.pack is None:
+            log_error('WORLD', 'Select a game directory or an asset pack to import %s' % (self.path))
             return {'CANCELLED'}
 
         world_collection = bpy.data.collections.new(self.name)
@@ -147,70 +210,36 @@ class ActorXWorld:
 
         old_active_layer = context.view_layer.active_layer_collection
 
-        mesh_cache: dict[tuple[str, frozenset], Collection] = {}
+        plan = WorldPlan(self.psw, self.settings)
 
-        actor_cache: list[Collection] = [None] * self.psw.NumActors
+        # every static asset is imported once, the actors below only instance it.
+        asset_cache: list[Collection | None] = [None] * plan.NumAssets
+        for asset_id in numpy.flatnonzero(plan.AssetIsStatic).tolist():
+            asset_cache[asset_id] = self.import_asset(context, plan, asset_id, actor_collection, actor_layer)
 
-        for actor_id, (name, game_path, parent, pos, rot, scale, no_shadow, hidden, _, is_static) in enumerate(self.psw.Actors):
-            if self.ignore_shapes and is_ignored_name(name):
-                continue
-            if self.ignore_lodactors and is_lodactor_or_hlod(name):
-                continue
+        # world matrices are resolved for the whole hierarchy up front, so every object only gets its final basis.
+        (actor_basis, actor_parents) = plan.get_transforms(self.psw, self.flatten_hierarchy)
+        actor_cache: list[Collection] = [None] * self.psw.NumActors
 
-            mesh_key = (game_path, frozenset(self.psw.OverrideMaterials[actor_id].items()))
+        for actor_id in plan.get_actor_ids().tolist():
+            name = self.psw.ActorNames[actor_id]
+            is_static = bool(plan.ActorIsStatic[actor_id])
+            asset_id = int(plan.ActorAsset[actor_id])
 
-            if self.no_skeletons and not is_static:
-                continue
-            
-            if self.no_static_instances:
-                is_static = False
-            
             mesh_obj = None
-            if mesh_key in mesh_cache and is_static:
-                mesh_obj = mesh_cache[mesh_key]
-            elif game_path != 'None' and self.import_mesh:
-                if self.ignore_shapes and is_ignored_name(game_path):
-                    continue
-                if self.ignore_lodactors and is_lodactor_or_hlod(game_path):
-                    continue
-                result_path = game_path.strip('/').strip('\\')
+            if asset_id < 0:
+                pass
+            elif is_static:
+                mesh_obj = asset_cache[asset_id]
+            elif enable_ueformat:
+                uemodel_path = normpath(join_path(self.game_dir, self.get_result_path(plan, asset_id) + '.uemodel'))
+                if exists(uemodel_path):
+                    import_settings = UEModelOptions(link=True, scale_factor=self.resize_mod, bone_length=5, reorient_bones=False)
+                    context.view_layer.active_layer_collection = instance_layer
+                    mesh_obj = UEFormatImport(import_settings).import_file(uemodel_path)
+            else:
+                log_error('WORLD', 'Can\'t find asset %s' % plan.AssetPaths[asset_id])
 
-                if sep != '/':
-                    result_path = result_path.replace('/', sep)
-                
-                if enable_ueformat:
-                    uemodel_path = normpath(join_path(self.game_dir, result_path + '.uemodel'))
-                    if exists(uemodel_path):
-                        import_settings = UEModelOptions(link=True, scale_factor=self.resize_mod, bone_length=5, reorient_bones=False)
-                        if is_static:
-                            mesh_obj = bpy.data.collections.new(name)
-                            actor_collection.children.link(mesh_obj)
-                            context.view_layer.active_layer_collection = actor_layer.children[-1]
-                            uemodel_obj = UEFormatImport(import_settings).import_file(uemodel_path)
-                            mesh_obj.name = undeduplicate_name(uemodel_obj.name)
-                            mesh_cache[mesh_key] = mesh_obj
-                        else:
-                            context.view_layer.active_layer_collection = instance_layer
-                            mesh_obj = UEFormatImport(import_settings).import_file(uemodel_path)
-                else:
-                    psk_path = normpath(join_path(self.game_dir, result_path + '.psk'))
-                    if not exists(psk_path):  # try getting pskx instead of psk
-                        psk_path += 'x'
-
-                    if is_static and exists(psk_path):
-                        log_info('WORLD', "importing model %s" % (psk_path))
-                        import_settings = self.settings.copy()
-                        import_settings['override_materials'] = self.psw.OverrideMaterials[actor_id]
-                        psk = ActorXMesh(psk_path, import_settings)
-                        mesh_obj = bpy.data.collections.new(psk.name)
-                        actor_collection.children.link(mesh_obj)
-                        context.view_layer.active_layer_collection = actor_layer.children[-1]
-                        psk.execute(context)
-                        mesh_cache[mesh_key] = mesh_obj
-                    else:
-                        log_error('WORLD', 'Can\'t find asset %s' % result_path)
-                        mesh_obj = None
-            
             instance_name = name
 
             if mesh_obj is not None:
@@ -228,31 +257,30 @@ class ActorXWorld:
             else:
                 instance = mesh_obj
 
-            instance.location = pos
             instance.rotation_mode = 'QUATERNION'
-            instance.rotation_quaternion = rot
-            instance.scale = scale
+            instance.matrix_basis = Matrix(actor_basis[actor_id].tolist())
 
-            if no_shadow:
+            if self.psw.ActorNoShadow[actor_id]:
                 instance.visible_shadow = False
 
-            if hidden:
+            if self.psw.ActorHidden[actor_id]:
                 instance.hide_render = True
                 instance.show_instancer_for_render = False
 
-            if parent > -1:
-                instance.parent = actor_cache[parent]
-
             actor_cache[actor_id] = instance
 
             if is_static:
                 instance_collection.objects.link(instance)
-        
+
+        # parents can come after their children, so they are assigned once every actor exists.
+        for actor_id in numpy.flatnonzero(actor_parents >= 0).tolist():
+            if actor_cache[actor_id] is not None:
+                actor_cache[actor_id].parent = actor_cache[actor_parents[actor_id]]
         actor_collection.hide_render = True
         actor_collection.hide_viewport = True
 
         if self.import_light:
-            for (actor_id, color, light_type, whl, attenuation, radius, temp, bias, lumens, angle) in self.psw.Lights:
+            for (actor_id, color, light_type, whl, attenuation, radius, temp, bias, lumens, angle) in to_lights(self.psw):
                 light_type_bl = 'POINT'
                 if light_type == 0:
                     if self.adjust_sun_intensity <= 0.0001:
@@ -270,11 +298,10 @@ class ActorXWorld:
                         continue
                     light_type_bl = 'AREA'
                 actor = actor_cache[actor_id]
-                actor_data = self.psw.Actors[actor_id]
                 bl_light_data = bpy.data.lights.new(name=actor.name + '_light', type=light_type_bl)
-                bl_light_data.use_shadow = not actor_data[6]
+                bl_light_data.use_shadow = not self.psw.ActorNoShadow[actor_id]
                 bl_light_data.color = color
-                if actor_data[8]:
+                if self.psw.ActorUseTemperature[actor_id]:
                     bl_light_data.color = convert_temperature(temp)
                     lumens = lumens * 100
                 bl_light_data.shadow_soft_size = bias
@@ -305,7 +332,7 @@ class ActorXWorld:
 
         if self.import_landscape:
             tiles: map[tuple[int, int], tuple[Object, Material, ShaderNodeTexCoord, set[str]]] = {}
-            for (tex_path, actor_id, pos, scale, type_id, tile_x, tile_y, bias, offset, dim) in self.psw.Landscapes:
+            for (tex_path, actor_id, pos, scale, type_id, tile_x, tile_y, bias, offset, dim) in to_landscapes(self.psw):
                 result_path = tex_path.strip('/').strip('\\')
                 if not result_path.endswith('.png'):
                     result_path += '.png'
@@ -442,4 +469,6 @@ class ActorXWorld:
             if len(collection.all_objects) == 0:
                 world_collection.children.unlink(collection)
 
+        self.psw.release()
+
         return {'FINISHED'}
@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import shutil
+import typing
+
+import numpy
+from io_import_pskx.io import Animation, AnimationV2, Mesh, Skeleton, Track, World, load_actorx
+from io_import_pskx.utils import log_error, log_info
+from numpy import ndarray
+
+# bump when the finalized representation of any data class changes, old entries are never read again.
+CACHE_VERSION: int = 8
+CACHE_META: str = 'meta.json'
+DEFAULT_CACHE_DIR: str = os.path.join(os.path.expanduser('~'), '.cache', 'io_import_pskx')
+DEFAULT_CACHE_SIZE: int = 4 << 30
+
+# settings that change the result of finalize, everything else is only read by the blender side.
+cache_settings: tuple[str, ...] = ('resize_by', 'weld_vertices')
+
+cache_classes: dict[str, type] = {cls.__name__: cls for cls in (Mesh, Animation, AnimationV2, World, Skeleton, Track)}
+
+
+def get_fields(ob: typing.Any) -> list[str]:
+    # raw chunk arrays and the source buffer are only needed until finalize.
+    names = getattr(type(ob), '__slots__', None) or vars(ob).keys()
+    return [name for name in names if not name.startswith('NP') and name != 'Source' and hasattr(ob, name)]
+
+
+class CacheEncoder:
+    directory: str
+    arrays: int
+    size: int  # bytes written to array files
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.arrays = 0
+        self.size = 0
+
+    def encode(self, value: typing.Any) -> typing.Any:
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        elif isinstance(value, numpy.generic):
+            return value.item()
+        elif isinstance(value, ndarray):
+            # arrays are stored as .npy files so a cache hit can map them instead of reading them.
+            array_path = os.path.join(self.directory, '%d.npy' % (self.arrays))
+            numpy.save(array_path, value, allow_pickle=False)
+            self.size += os.path.getsize(array_path)
+            self.arrays += 1
+            return {'$array': self.arrays - 1}
+        elif isinstance(value, tuple):
+            return {'$tuple': [self.encode(item) for item in value]}
+        elif isinstance(value, list):
+            return [self.encode(item) for item in value]
+        elif isinstance(value, dict):
+            return {'$dict': [[self.encode(key), self.encode(item)] for key, item in value.items()]}
+        elif type(value) in cache_classes.values():
+            return {'$object': type(value).__name__, 'fields': {name: self.encode(getattr(value, name)) for name in get_fields(value)}}
+
+        raise TypeError('Cannot cache %s' % (type(value).__name__))
+
+
+class CacheDecoder:
+    directory: str
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def decode(self, value: typing.Any) -> typing.Any:
+        if isinstance(value, list):
+            return [self.decode(item) for item in value]
+        elif not isinstance(value, dict):
+            return value
+        elif '$array' in value:
+            return numpy.load(os.path.join(self.directory, '%d.npy' % (value['$array'])), mmap_mode='r', allow_pickle=False)
+        elif '$tuple' in value:
+            return tuple(self.decode(item) for item in value['$tuple'])
+        elif '$dict' in value:
+            return {self.decode(key): self.decode(item) for key, item in value['$dict']}
+
+        cls = cache_classes[value['$object']]
+        ob = cls.__new__(cls)
+        if hasattr(cls, 'TYPE'):
+            # data classes reset their raw chunk fields in __init__.
+            ob.__init__()
+        for name, field in value['fields'].items():
+            setattr(ob, name, self.decode(field))
+        return ob
+
+
+class ActorXCache:
+    cache_dir: str
+    max_size: int
+    total_size: int | None  # running size of every entry, None until the directory is scanned once
+
+    def __init__(self, cache_dir: str | None = None, max_size: int = DEFAULT_CACHE_SIZE):
+        self.cache_dir = cache_dir if cache_dir else DEFAULT_CACHE_DIR
+        self.max_size = max_size
+        self.total_size = None
+
+    @staticmethod
+    def get_key(path: str, settings: dict[str, typing.Any], skip_chunks: set[str] | None) -> str | None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        identity = {
+                'version':     CACHE_VERSION,
+                'path':        os.path.normcase(os.path.abspath(path)),
+                'size':        stat.st_size,
+                'mtime':       stat.st_mtime_ns,
+                'settings':    [settings[name] if name in settings else None for name in cache_settings],
+                'skip_chunks': sorted(skip_chunks) if skip_chunks else [],
+        }
+        return hashlib.sha1(json.dumps(identity, sort_keys=True).encode('utf8')).hexdigest()
+
+    def load(self, key: str) -> Animation | AnimationV2 | Mesh | World | None:
+        directory = os.path.join(self.cache_dir, key)
+        meta_path = os.path.join(directory, CACHE_META)
+        if not os.path.exists(meta_path):
+            return None
+
+        try:
+            with open(meta_path, 'r', encoding='utf8') as stream:
+                meta = json.load(stream)
+            ob = CacheDecoder(directory).decode(meta['object'])
+        except (OSError, ValueError, KeyError) as e:
+            log_error('CACHE', 'Dropping unreadable entry %s: %s' % (key, e))
+            shutil.rmtree(directory, ignore_errors=True)
+            return None
+
+        # the meta file time is the last use for eviction.
+        os.utime(meta_path)
+        return ob
+
+    def store(self, key: str, ob: Animation | AnimationV2 | Mesh | World):
+        directory = os.path.join(self.cache_dir, key)
+        temp_directory = '%s.%d.tmp' % (directory, os.getpid())
+        shutil.rmtree(temp_directory, ignore_errors=True)
+        os.makedirs(temp_directory)
+
+        try:
+            encoder = CacheEncoder(temp_directory)
+            meta = {'object': encoder.encode(ob)}
+            # the meta file itself is small next to the arrays and isn't counted.
+            meta['size'] = encoder.size
+            with open(os.path.join(temp_directory, CACHE_META), 'w', encoding='utf8') as stream:
+                json.dump(meta, stream, separators=(',', ':'))
+            os.replace(temp_directory, directory)
+        except (OSError, TypeError) as e:
+            log_error('CACHE', 'Could not store entry %s: %s' % (key, e))
+            shutil.rmtree(temp_directory, ignore_errors=True)
+            return
+
+        # the directory is only walked when the running total goes over the limit.
+        if self.total_size is None:
+            self.total_size = sum(size for _, size, _ in self.get_entries())
+        else:
+            self.total_size += meta['size']
+        if self.total_size > self.max_size:
+            self.evict()
+
+    def get_entries(self) -> list[tuple[float, int, str]]:
+        # (last use, size, directory) of every entry.
+        entries: list[tuple[float, int, str]] = []
+        for name in os.listdir(self.cache_dir):
+            directory = os.path.join(self.cache_dir, name)
+            meta_path = os.path.join(directory, CACHE_META)
+            try:
+                with open(meta_path, 'r', encoding='utf8') as stream:
+                    meta = json.load(stream)
+                if 'size' in meta:
+                    size = meta['size']
+                else:
+                    # entries written before sizes were recorded.
+                    size = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+                entries.append((os.path.getmtime(meta_path), size, directory))
+            except (OSError, ValueError):
+                continue
+        return entries
+
+    def evict(self):
+        # drops the least recently used entries until the cache fits in max_size.
+        entries: list[tuple[float, int, str]] = self.get_entries()
+        self.total_size = sum(size for _, size, _ in entries)
+        for (_, size, directory) in sorted(entries):
+            if self.total_size <= self.max_size:
+                break
+            try:
+                shutil.rmtree(directory)
+            except OSError as e:
+                # entries that are still mapped can't be removed on every platform.
+                log_error('CACHE', 'Could not evict %s: %s' % (directory, e))
+                continue
+            self.total_size -= size
+
+
+# one cache per directory and limit for the session, so the running size survives between imports.
+caches: dict[tuple[str | None, int], ActorXCache] = {}
+
+
+def get_cache(cache_dir: str | None = None, max_size: int = DEFAULT_CACHE_SIZE) -> ActorXCache:
+    if (cache_dir, max_size) not in caches:
+        caches[(cache_dir, max_size)] = ActorXCache(cache_dir, max_size)
+    return caches[(cache_dir, max_size)]
+
+
+def load_actorx_cached(path: str, settings: dict[str, typing.Any], skip_chunks: set[str] | None = None) -> Animation | AnimationV2 | Mesh | World | None:
+    if 'use_cache' not in settings or not settings['use_cache']:
+        return load_actorx(path, settings, skip_chunks)
+
+    cache = get_cache(settings['cache_dir'] if 'cache_dir' in settings else None, settings['cache_size'] if 'cache_size' in settings else DEFAULT_CACHE_SIZE)
+    key = cache.get_key(path, settings, skip_chunks)
+    if key is None:
+        return load_actorx(path, settings, skip_chunks)
+
+    ob = cache.load(key)
+    if ob is not None:
+        log_info('CACHE', 'Loaded %s from cache' % (path))
+        return ob
+
+    ob = load_actorx(path, settings, skip_chunks)
+    if ob is not None:
+        os.makedirs(cache.cache_dir, exist_ok=True)
+        cache.store(key, ob)
+    return ob
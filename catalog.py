@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import typing
+from struct import unpack_from
+
+import numpy
+from io_import_pskx.io import Chunk, get_chunk_layout, iter_stream_chunks, open_decompressor, read_chunk, read_into, read_toc
+from io_import_pskx.utils import compressed_extensions, fix_string, fix_string_np, log_error, log_info
+from numpy import ndarray
+
+CATALOG_NAME: str = '.actorx_catalog.json'
+CATALOG_VERSION: int = 1
+
+animation_extensions: tuple[str, ...] = ('.psa', '.psax')
+
+# the only chunks read while cataloging, track and key payloads are skipped over.
+header_keys: set[str] = {'SEQUENCES', 'ANIMINFO', 'REFSKELT', 'REFSKEL0', 'BONENAMES'}
+track_keys: set[str] = {'POSTRACK', 'ROTTRACK', 'SCLTRACK'}
+
+
+class CatalogEntry(typing.NamedTuple):
+    path: str  # relative to the catalog directory.
+    sequence_id: int
+    name: str
+    group: str
+    frame_rate: float
+    additive: bool
+    num_frames: int  # longest track for AnimationV2 sequences.
+    num_keys: int
+    num_bones: int
+    bone_hash: str
+
+
+def get_bone_hash(names: list[str]) -> str:
+    return hashlib.sha1('\n'.join(names).encode('utf8')).hexdigest()[:16]
+
+
+def read_headers(stream: typing.BinaryIO) -> tuple[str, list[Chunk], dict[str, ndarray]]:
+    # returns every chunk header, but only the data of the header chunks.
+    decompressor = open_decompressor(stream)
+    if decompressor is None:
+        (magic, toc) = read_toc(stream)
+        headers: dict[str, ndarray] = {}
+        for chunk in toc:
+            if chunk.key in header_keys:
+                data = read_chunk(stream, chunk)
+                if data is not None:
+                    headers[chunk.key] = data
+        return (magic, toc, headers)
+
+    with decompressor:
+        # compressed files have no random access, track payloads are still decompressed but never copied.
+        header = bytearray(32)
+        if read_into(decompressor, memoryview(header)) < 32:
+            return ('', [], {})
+
+        magic = fix_string(unpack_from('20s', header, 0)[0])
+        toc: list[Chunk] = []
+        headers: dict[str, ndarray] = {}
+        for (chunk, data) in iter_stream_chunks(decompressor, lambda chunk: chunk.key in header_keys):
+            toc.append(chunk)
+            if data is None:
+                continue
+
+            layout = get_chunk_layout(chunk)
+            if layout is not None:
+                headers[chunk.key] = numpy.frombuffer(data, dtype=layout, count=chunk.count)
+
+        return (magic, toc, headers)
+
+
+def scan_animation(path: str) -> list[dict[str, typing.Any]]:
+    with open(path, 'rb') as stream:
+        (magic, toc, headers) = read_headers(stream)
+
+    bones: ndarray | None = None
+    for key in ('REFSKELT', 'REFSKEL0', 'BONENAMES'):
+        if key in headers:
+            bones = headers[key]
+            break
+
+    bone_names: list[str] = [fix_string_np(name) for name in bones['name']] if bones is not None else []
+    bone_hash = get_bone_hash(bone_names)
+
+    sequences: list[dict[str, typing.Any]] = []
+    if magic == 'ANIXHEAD' and 'SEQUENCES' in headers:
+        # the key count of every track is in its chunk header, ROTTRACK0:57 = sequence 0, bone 57.
+        num_sequences = len(headers['SEQUENCES'])
+        num_keys: ndarray = numpy.zeros(num_sequences, dtype=numpy.int64)
+        num_frames: ndarray = numpy.zeros(num_sequences, dtype=numpy.int64)
+        for chunk in toc:
+            if chunk.key in track_keys and len(chunk.index) == 2 and chunk.index[0] < num_sequences:
+                num_keys[chunk.index[0]] += chunk.count
+                num_frames[chunk.index[0]] = max(num_frames[chunk.index[0]], chunk.count)
+
+        for sequence_id, (name, frame_rate, additive) in enumerate(zip(headers['SEQUENCES']['name'], headers['SEQUENCES']['framerate'].tolist(), headers['SEQUENCES']['additive'].tolist())):
+            sequences.append({
+                    'name':       fix_string_np(name),
+                    'group':      '',
+                    'frame_rate': frame_rate,
+                    'additive':   additive != 0,
+                    'num_frames': int(num_frames[sequence_id]),
+                    'num_keys':   int(num_keys[sequence_id]),
+            })
+    elif magic == 'ANIMHEAD' and 'ANIMINFO' in headers:
+        info = headers['ANIMINFO']
+        for (name, group, total_bones, frame_rate, num_frames) in zip(info['name'], info['group'], info['total_bones'].tolist(), info['frame_rate'].tolist(), info['num_frames'].tolist()):
+            sequences.append({
+                    'name':       fix_string_np(name),
+                    'group':      fix_string_np(group),
+                    'frame_rate': frame_rate,
+                    'additive':   False,
+                    'num_frames': num_frames,
+                    'num_keys':   num_frames * total_bones,
+            })
+
+    return [dict(sequence, num_bones=len(bone_names), bone_hash=bone_hash) for sequence in sequences]
+
+
+def find_animations(root_dir: str) -> list[str]:
+    suffixes = tuple(extension + compressed_extension for extension in animation_extensions for compressed_extension in ('',) + compressed_extensions)
+    paths: list[str] = []
+    for dir_path, _, file_names in os.walk(root_dir):
+        for file_name in file_names:
+            if file_name.lower().endswith(suffixes):
+                paths.append(os.path.relpath(os.path.join(dir_path, file_name), root_dir).replace('\\', '/'))
+    paths.sort()
+    return paths
+
+
+class ActorXCatalog:
+    root_dir: str
+    path: str
+    files: dict[str, dict[str, typing.Any]]  # relative path = size, mtime and sequences
+    entries: list[CatalogEntry]
+
+    def __init__(self, root_dir: str, path: str | None = None):
+        self.root_dir = root_dir
+        self.path = path if path is not None else os.path.join(root_dir, CATALOG_NAME)
+        self.files = {}
+        self.entries = []
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf8') as stream:
+                    catalog = json.load(stream)
+                if catalog['version'] == CATALOG_VERSION:
+                    self.files = catalog['files']
+            except (OSError, ValueError, KeyError) as e:
+                log_error('CATALOG', 'Could not read %s: %s' % (self.path, e))
+
+    def update(self) -> int:
+        # rescans files whose size or modification time changed since the catalog was written.
+        files: dict[str, dict[str, typing.Any]] = {}
+        scanned = 0
+        for relative_path in find_animations(self.root_dir):
+            stat = os.stat(os.path.join(self.root_dir, relative_path))
+            known = self.files.get(relative_path)
+            if known is not None and known['size'] == stat.st_size and known['mtime'] == stat.st_mtime_ns:
+                files[relative_path] = known
+                continue
+
+            try:
+                sequences = scan_animation(os.path.join(self.root_dir, relative_path))
+            except (OSError, EOFError, ValueError) as e:
+                log_error('CATALOG', 'Could not read %s: %s' % (relative_path, e))
+                sequences = []
+
+            files[relative_path] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sequences': sequences}
+            scanned += 1
+
+        changed = scanned > 0 or len(files) != len(self.files)
+        self.files = files
+        self.entries = [CatalogEntry(relative_path, sequence_id, **sequence) for relative_path, file in self.files.items() for sequence_id, sequence in enumerate(file['sequences'])]
+
+        if changed:
+            log_info('CATALOG', 'Scanned %d of %d files in %s' % (scanned, len(files), self.root_dir))
+            self.save()
+
+        return scanned
+
+    def save(self):
+        try:
+            with open(self.path, 'w', encoding='utf8') as stream:
+                json.dump({'version': CATALOG_VERSION, 'files': self.files}, stream, separators=(',', ':'))
+        except OSError as e:
+            log_error('CATALOG', 'Could not write %s: %s' % (self.path, e))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getitem__(self, index: int) -> CatalogEntry:
+        return self.entries[index]
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) != 2:
+        log_error('CATALOG', 'usage: python -m io_import_pskx.catalog <animation directory>')
+        sys.exit(1)
+
+    ActorXCatalog(sys.argv[1]).update()
@@ -1,51 +1,67 @@
+import gzip
+import lzma
+import mmap
 import typing
+import zlib
+from functools import lru_cache
 from enum import Enum
-from struct import unpack
+from queue import Full, Queue
+from struct import unpack, unpack_from
+from threading import Event, Thread
 
 import numpy
-from bpy.types import Property
-from io_import_pskx.utils import fix_string_np, fix_string, log_error
-from mathutils import Quaternion, Vector, Color
+from io_import_pskx.utils import fix_string_np, fix_strings_np, fix_string, log_error, log_warning
 from numpy import dtype, ndarray
-from numpy.typing import DTypeLike
-
-
-dispatch: dict[str, DTypeLike] = {
-        'PNTS0000':     dtype([('xyz', '3f')]),
-        'VTXW0000':     dtype([('vertex_id', 'I'), ('uv', '2f'), ('mat_id', 'B')], align=True),
-        'VTXW3200':     dtype([('vertex_id', 'I'), ('uv', '2f'), ('mat_id', 'B')], align=True),
-        'FACE0000':     dtype([('abc', '3H'), ('mat_id', 'B'), ('aux_mat_id', 'B'), ('group', 'I')]),
-        'FACE3200':     dtype([('abc', '3I'), ('mat_id', 'B'), ('aux_mat_id', 'B'), ('group', 'I')]),
-        'VTXNORMS':     dtype([('xyz', '3f')]),
-        'VTXTANGS':     dtype([('xyzw', '4f')]),
-        'MATT0000':     dtype([('name', '64b'), ('tex_id', 'i'), ('poly_flags', 'I'), ('aux_mat_id', 'i'), ('aux_flags', 'I'), ('lod_bias', 'i'), ('lod_style', 'i')]),
-        'REFSKELT':     dtype([('name', '64b'), ('flags', 'I'), ('num_children', 'i'), ('parent_id', 'i'), ('rot', '4f'), ('pos', '3f'), ('length', 'f'), ('scale', '3f')]),
-        'REFSKEL0':     dtype([('name', '64b'), ('flags', 'I'), ('num_children', 'i'), ('parent_id', 'i'), ('rot', '4f'), ('pos', '3f'), ('length', 'f'), ('scale', '3f')]),
-        'SKELSOCK':     dtype([('name', '64b'), ('bone_name', '64b'), ('pos', '3f'), ('rot', '3f'), ('scale', '3f')]),
-        'BONENAMES':    dtype([('name', '64b'), ('flags', 'I'), ('num_children', 'i'), ('parent_id', 'i'), ('rot', '4f'), ('pos', '3f'), ('length', 'f'), ('scale', '3f')]),
-        'RAWWEIGHTS':   dtype([('weight', 'f'), ('vertex_id', 'i'), ('bone_id', 'i')]),
-        'RAWW0000':     dtype([('weight', 'f'), ('vertex_id', 'i'), ('bone_id', 'i')]),
-        'VERTEXCOLOR':  dtype([('rgba', '4B')]),
-        'EXTRAUVS':     dtype([('uv', '2f')]),
-        'MORPHTARGET':  dtype([('vertex_id', 'i'), ('xyz', '3f')]),
-        'MORPHNAMES':   dtype([('name', '64b')]),
-        'PHYSICS0':     dtype([('name', '64b'), ('type', 'B'), ('center', '3f'), ('rot', '3f'), ('scale', '3f')]),
-        'SHAPEELEMS':   dtype([('name', '64b'), ('type', 'i'), ('center', '3f'), ('rot', '4f'), ('scale', '3f')]),
-        'ANIMINFO':     dtype([('name', '64b'), ('group', '64b'), ('total_bones', 'i'), ('root_included', 'i'), ('key_compression_style', 'i'), ('key_quotum', 'i'), ('key_reduction', 'f'), ('duration', 'f'), ('frame_rate', 'f'), ('start_bone', 'i'), ('first_frame', 'i'), ('num_frames', 'i')]),
-        'ANIMKEYS':     dtype([('pos', '3f'), ('rot', '4f'), ('time', 'f')]),
-        'SCALEKEYS':    dtype([('scale', '3f'), ('time', 'f')]),
-        'SEQUENCES':    dtype([('name', '64b'), ('framerate', 'f'), ('additive', 'i')]),
-        'ROTTRACK':     dtype([('time', 'f'), ('xyzw', '4f')]),
-        'POSTRACK':     dtype([('time', 'f'), ('xyz', '3f')]),
-        'SCLTRACK':     dtype([('time', 'f'), ('xyz', '3f')]),
-        'WORLDACTORS::2': dtype([('name', '256b'), ('asset', '256b'), ('parent', 'i'), ('pos', '3f'), ('rot', '4f'), ('scale', '3f'), ('flags', 'i')]),
-        'WORLDACTORS':  dtype([('name', '64b'), ('asset', '256b'), ('parent', 'i'), ('pos', '3f'), ('rot', '4f'), ('scale', '3f'), ('flags', 'i')]),
-        'WORLDLIGHTS':  dtype([('parent', 'i'), ('color', '4B'), ('type', 'i'), ('whl', '3f'), ('attenuation', 'f'), ('radius', 'f'), ('temp', 'f'), ('bias', 'f'), ('lumens', 'f'), ('angle', 'f')]),
-        'LANDSCAPE':    dtype([('name', '256b'), ('actor_id', 'i'), ('x', 'i'), ('y', 'i'), ('type', 'i'), ('size', 'i'), ('bias', 'i'), ('offset', '2f'), ('dim', '2i')]),
-        'INSTMATERIAL': dtype([('actor_id', 'i'), ('material_id', 'i'), ('name', '64b')]),
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# known record layouts for every chunk, a layout is picked by the record size in the chunk header.
+dispatch: dict[str, list[dtype]] = {
+        'PNTS0000':     [dtype([('xyz', '3f')])],
+        'VTXW0000':     [dtype([('vertex_id', 'I'), ('uv', '2f'), ('mat_id', 'B')], align=True)],
+        'VTXW3200':     [dtype([('vertex_id', 'I'), ('uv', '2f'), ('mat_id', 'B')], align=True)],
+        'FACE0000':     [dtype([('abc', '3H'), ('mat_id', 'B'), ('aux_mat_id', 'B'), ('group', 'I')])],
+        'FACE3200':     [dtype([('abc', '3I'), ('mat_id', 'B'), ('aux_mat_id', 'B'), ('group', 'I')])],
+        'VTXNORMS':     [dtype([('xyz', '3f')])],
+        'VTXTANGS':     [dtype([('xyzw', '4f')])],
+        'MATT0000':     [dtype([('name', '64b'), ('tex_id', 'i'), ('poly_flags', 'I'), ('aux_mat_id', 'i'), ('aux_flags', 'I'), ('lod_bias', 'i'), ('lod_style', 'i')])],
+        'REFSKELT':     [dtype([('name', '64b'), ('flags', 'I'), ('num_children', 'i'), ('parent_id', 'i'), ('rot', '4f'), ('pos', '3f'), ('length', 'f'), ('scale', '3f')])],
+        'REFSKEL0':     [dtype([('name', '64b'), ('flags', 'I'), ('num_children', 'i'), ('parent_id', 'i'), ('rot', '4f'), ('pos', '3f'), ('length', 'f'), ('scale', '3f')])],
+        'SKELSOCK':     [dtype([('name', '64b'), ('bone_name', '64b'), ('pos', '3f'), ('rot', '3f'), ('scale', '3f')])],
+        'BONENAMES':    [dtype([('name', '64b'), ('flags', 'I'), ('num_children', 'i'), ('parent_id', 'i'), ('rot', '4f'), ('pos', '3f'), ('length', 'f'), ('scale', '3f')])],
+        'RAWWEIGHTS':   [dtype([('weight', 'f'), ('vertex_id', 'i'), ('bone_id', 'i')])],
+        'RAWW0000':     [dtype([('weight', 'f'), ('vertex_id', 'i'), ('bone_id', 'i')])],
+        'VERTEXCOLOR':  [dtype([('rgba', '4B')])],
+        'EXTRAUVS':     [dtype([('uv', '2f')])],
+        'MORPHTARGET':  [dtype([('vertex_id', 'i'), ('xyz', '3f')])],
+        'MORPHNAMES':   [dtype([('name', '64b')])],
+        'PHYSICS0':     [dtype([('name', '64b'), ('type', 'B'), ('center', '3f'), ('rot', '3f'), ('scale', '3f')])],
+        'SHAPEELEMS':   [dtype([('name', '64b'), ('type', 'i'), ('center', '3f'), ('rot', '4f'), ('scale', '3f')])],
+        'ANIMINFO':     [dtype([('name', '64b'), ('group', '64b'), ('total_bones', 'i'), ('root_included', 'i'), ('key_compression_style', 'i'), ('key_quotum', 'i'), ('key_reduction', 'f'), ('duration', 'f'), ('frame_rate', 'f'), ('start_bone', 'i'), ('first_frame', 'i'), ('num_frames', 'i')])],
+        'ANIMKEYS':     [dtype([('pos', '3f'), ('rot', '4f'), ('time', 'f')])],
+        'SCALEKEYS':    [dtype([('scale', '3f'), ('time', 'f')])],
+        'SEQUENCES':    [dtype([('name', '64b'), ('framerate', 'f'), ('additive', 'i')])],
+        'ROTTRACK':     [dtype([('time', 'f'), ('xyzw', '4f')])],
+        'POSTRACK':     [dtype([('time', 'f'), ('xyz', '3f')])],
+        'SCLTRACK':     [dtype([('time', 'f'), ('xyz', '3f')])],
+        'WORLDACTORS':  [dtype([('name', '64b'), ('asset', '256b'), ('parent', 'i'), ('pos', '3f'), ('rot', '4f'), ('scale', '3f'), ('flags', 'i')]), dtype([('name', '256b'), ('asset', '256b'), ('parent', 'i'), ('pos', '3f'), ('rot', '4f'), ('scale', '3f'), ('flags', 'i')])],
+        'WORLDLIGHTS':  [dtype([('parent', 'i'), ('color', '4B'), ('type', 'i'), ('whl', '3f'), ('attenuation', 'f'), ('radius', 'f'), ('temp', 'f'), ('bias', 'f'), ('lumens', 'f'), ('angle', 'f')])],
+        'LANDSCAPE':    [dtype([('name', '256b'), ('actor_id', 'i'), ('x', 'i'), ('y', 'i'), ('type', 'i'), ('size', 'i'), ('bias', 'i'), ('offset', '2f'), ('dim', '2i')])],
+        'INSTMATERIAL': [dtype([('actor_id', 'i'), ('material_id', 'i'), ('name', '64b')])],
 }
 
 
+def convert_uv(uv: ndarray, loops: ndarray) -> ndarray:
+    # gathers per-wedge uvs into per-loop uvs, flipping v.
+    loop_uv: ndarray = uv[loops]
+    loop_uv[:, 1] = 1.0 - loop_uv[:, 1]
+    return loop_uv
+
+
 class PhysicsShape(Enum):
     Cube = 0
     Sphere = 1
@@ -61,10 +77,47 @@ class DataType(Enum):
     World = 3
 
 
+class Skeleton:
+    __slots__ = ('NumBones', 'Names', 'Parents', 'Rotations', 'Positions', 'Scales')
+
+    NumBones: int
+
+    Names: list[str]
+    Parents: ndarray  # int32 (bones,)
+    Rotations: ndarray  # float32 (bones, 4), w-first
+    Positions: ndarray  # float32 (bones, 3)
+    Scales: ndarray  # float32 (bones, 3)
+
+    def __init__(self, bones: ndarray, resize_by: float, scale_resize_by: float):
+        self.NumBones = len(bones)
+        self.Names = [fix_string_np(bone_name) for bone_name in bones['name']]
+        self.Parents = bones['parent_id'].astype(numpy.int32)
+        self.Rotations = bones['rot'][:, (3, 0, 1, 2)].astype(numpy.float32)
+        self.Positions = bones['pos'] * numpy.float32(resize_by)
+        self.Scales = bones['scale'] * numpy.float32(scale_resize_by)
+
+    def __len__(self) -> int:
+        return self.NumBones
+
+
+def expand_points(point_vertices: tuple[ndarray, ndarray, ndarray], points: ndarray) -> tuple[ndarray, ndarray]:
+    # int32 ids of the vertices made from every point in order, and the number of vertices each point expands to.
+    (vertex_order, point_starts, point_counts) = point_vertices
+    repeats: ndarray = point_counts[points]
+    offsets: ndarray = numpy.arange(repeats.sum()) - numpy.repeat(numpy.cumsum(repeats) - repeats, repeats)
+    return (vertex_order[numpy.repeat(point_starts[points], repeats) + offsets].astype(numpy.int32), repeats)
+
+
 class Mesh:
+    __slots__ = ('Source', 'NumVertices', 'NumPoints', 'NumFaces', 'NumMaterials', 'NumShapes', 'NumUVs', 'NumBones', 'NumSockets', 'NumHitboxes',
+                 'Welded', 'Repairs', 'Vertices', 'VertexPoints', 'Faces', 'Normals', 'Tangents', 'Materials', 'MaterialNames', 'Bones', 'Weights', 'Sockets', 'Colors', 'CornerColors', 'UVs', 'ShapeKeys', 'Physics',
+                 'NPPoints', 'NPWedges', 'NPFaces', 'NPNormals', 'NPTangents', 'NPMaterials', 'NPBones', 'NPWeights', 'NPColors', 'NPUVs', 'NPShapeKeys', 'NPShapeNames', 'NPPhysics', 'NPSockets')
+
     TYPE: DataType = DataType.Mesh
+    Source: mmap.mmap | memoryview | bytes | None
 
     NumVertices: int
+    NumPoints: int
     NumFaces: int
     NumMaterials: int
     NumShapes: int
@@ -73,19 +126,23 @@ class Mesh:
     NumSockets: int
     NumHitboxes: int
 
-    Vertices: list[list[float]]
-    Faces: list[list[int]]
-    Normals: list[list[float]] | None
-    Tangents: list[list[float]] | None
-    Materials: list[int] | None
+    Welded: bool  # vertices are the PNTS points instead of one vertex per wedge
+    Repairs: list[str]  # what finalize had to fix or drop, empty for a clean mesh
+    Vertices: ndarray  # float32 (vertices, 3)
+    VertexPoints: ndarray  # int32 (vertices,), PNTS index of every vertex
+    Faces: ndarray  # int32 (faces, 3), blender winding
+    Normals: ndarray | None  # float32 (vertices, 3), or (loops, 3) when welded
+    Tangents: ndarray | None  # float32 (vertices, 4)
+    Materials: ndarray | None  # int32 (faces,)
     MaterialNames: list[str] | None
-    Bones: list[tuple[str, int, Quaternion, Vector, Vector]] | None
-    Weights: list[tuple[int, int, float]] | None
-    Sockets: list[tuple[str, str, Vector, Vector, Vector]] | None
-    Colors: list[list[float]] | None
-    UVs: list[list[float]]
-    ShapeKeys: dict[str, list[float]]
-    Physics: list[tuple[str, PhysicsShape, Vector, Quaternion, Vector]]
+    Bones: Skeleton | None
+    Weights: ndarray | None  # (weight, vertex_id, bone_id) records
+    Sockets: list[tuple[str, str, list[float], list[float], list[float]]] | None  # name, bone, pos, rot, scale
+    Colors: ndarray | None  # uint8 (vertices, 4), or (loops, 4) when CornerColors
+    CornerColors: bool
+    UVs: list[ndarray]  # float32 (loops, 2)
+    ShapeKeys: dict[str, tuple[ndarray, ndarray]]  # int32 (touched,) vertex ids, float32 (touched, 3) deltas from Vertices
+    Physics: list[tuple[str, PhysicsShape, list[float], list[float], list[float]]]
 
     NPPoints: ndarray
     NPWedges: ndarray
@@ -96,12 +153,16 @@ class Mesh:
     NPBones: ndarray | None
     NPWeights: ndarray | None
     NPColors: ndarray | None
-    NPUVs: list[ndarray]
-    NPShapeKeys: list[ndarray]
+    NPUVs: dict[int, ndarray]
+    NPShapeKeys: dict[int, ndarray]
     NPShapeNames: ndarray | None
     NPPhysics: ndarray | None
+    NPSockets: ndarray | None
 
     def __init__(self):
+        self.Source = None
+        self.Welded = False
+        self.Repairs = []
         self.NumMaterials = 0
         self.NumShapes = 0
         self.NumUVs = 0
@@ -116,6 +177,7 @@ class Mesh:
         self.Bones = None
         self.Weights = None
         self.Colors = None
+        self.CornerColors = False
         self.UVs = list()
         self.ShapeKeys = {}
         self.Physics = None
@@ -127,13 +189,14 @@ class Mesh:
         self.NPBones = None
         self.NPWeights = None
         self.NPColors = None
-        self.NPUVs = list()
-        self.NPShapeKeys = list()
+        self.NPUVs = {}
+        self.NPShapeKeys = {}
         self.NPShapeNames = None
         self.NPPhysics = None
         self.NPSockets = None
 
-    def __setitem__(self, key: str, value: ndarray):
+    def __setitem__(self, chunk: tuple[str, tuple[int, ...]], value: ndarray):
+        (key, index) = chunk
         if key == 'PNTS0000':
             self.NPPoints = value
         elif key == 'VTXW0000' or key == 'VTXW3200':
@@ -154,50 +217,70 @@ class Mesh:
             self.NPColors = value
         elif key == 'SKELSOCK':
             self.NPSockets = value
-        elif key[:8] == 'EXTRAUVS':
-            self.NPUVs.append(value)
-        elif key[:11] == 'MORPHTARGET':
-            self.NPShapeKeys.append(value)
+        elif key == 'EXTRAUVS':
+            self.NPUVs[index[0] if len(index) > 0 else len(self.NPUVs)] = value
+        elif key == 'MORPHTARGET':
+            self.NPShapeKeys[index[0] if len(index) > 0 else len(self.NPShapeKeys)] = value
         elif key == 'MORPHNAMES':
             self.NPShapeNames = value
         elif key == 'SHAPEELEMS':
             self.NPPhysics = value
 
-    def finalize(self, settings: dict[str, Property]):
-        # todo(ada): investigate if this can be converted to numpy.
-        self.NumVertices = len(self.NPWedges)
-        self.NumFaces = len(self.NPFaces)
-
-        self.Vertices = [None] * self.NumVertices
+    def finalize(self, settings: dict[str, typing.Any]):
+        self.NumPoints = len(self.NPPoints)
 
         resize_by: float = settings['resize_by'] if 'resize_by' in settings else 0.01
-
-        for wedge_id, (vertex_id, uv, material_id) in enumerate(self.NPWedges):
-            self.Vertices[wedge_id] = (self.NPPoints[vertex_id]['xyz'] * resize_by).tolist()
-
-        self.Faces = [None] * self.NumFaces
-        self.UVs = [[None] * self.NumFaces * 3]
-        NPWedgeUV = (self.NPWedges['uv'] * [(1.0, -1.0)] + [(0.0, 1.0)]).tolist()
+        self.Welded = settings['weld_vertices'] if 'weld_vertices' in settings else False
+
+        # blender winds faces the other way around. loops index wedges, which hold the per corner attributes.
+        wedge_points: ndarray = self.NPWedges['vertex_id'].astype(numpy.int64)
+        bad_wedges: ndarray = (wedge_points < 0) | (wedge_points >= self.NumPoints)
+        if numpy.any(bad_wedges):
+            self.Repairs.append('%d wedges pointing to missing points' % (numpy.count_nonzero(bad_wedges)))
+            wedge_points[bad_wedges] = 0
+        wedge_points = wedge_points.astype(numpy.int32)
+
+        wedge_loops: ndarray = self.NPFaces['abc'][:, (1, 0, 2)].astype(numpy.int32)
+        face_ids: ndarray = self.get_valid_faces(wedge_points, wedge_loops, bad_wedges)
+        if len(face_ids) < len(wedge_loops):
+            wedge_loops = wedge_loops[face_ids]
+        self.NumFaces = len(wedge_loops)
+        loops: ndarray = wedge_loops.ravel()
+        if self.Welded:
+            self.VertexPoints = numpy.arange(self.NumPoints, dtype=numpy.int32)
+            self.Vertices = self.NPPoints['xyz'] * numpy.float32(resize_by)
+            self.Faces = wedge_points[wedge_loops]
+        else:
+            self.VertexPoints = wedge_points
+            self.Vertices = self.NPPoints['xyz'][wedge_points]
+            self.Vertices *= resize_by
+            self.Faces = wedge_loops
+        self.NumVertices = len(self.Vertices)
+
+        bad_vertices: ndarray = ~numpy.all(numpy.isfinite(self.Vertices), axis=1)
+        if numpy.any(bad_vertices):
+            self.Repairs.append('%d vertices with NaN or infinite positions moved to the origin' % (numpy.count_nonzero(bad_vertices)))
+            self.Vertices[bad_vertices] = 0.0
+
+        self.UVs = [convert_uv(self.NPWedges['uv'], loops)]
         has_materials = self.NPMaterials is not None and len(self.NPMaterials) > 0
         if has_materials:
-            self.Materials = [None] * self.NumFaces
-        for face_id, (rgb, material_id, _, _) in enumerate(self.NPFaces):
-            self.Faces[face_id] = [rgb[1], rgb[0], rgb[2]]
-            self.UVs[0][face_id * 3 + 0] = NPWedgeUV[self.Faces[face_id][0]]
-            self.UVs[0][face_id * 3 + 1] = NPWedgeUV[self.Faces[face_id][1]]
-            self.UVs[0][face_id * 3 + 2] = NPWedgeUV[self.Faces[face_id][2]]
-            if has_materials:
-                self.Materials[face_id] = material_id
+            self.Materials = self.NPFaces['mat_id'][face_ids].astype(numpy.int32)
+            bad_materials: ndarray = self.Materials >= len(self.NPMaterials)
+            if numpy.any(bad_materials):
+                self.Repairs.append('%d faces using missing materials moved to the first material' % (numpy.count_nonzero(bad_materials)))
+                self.Materials[bad_materials] = 0
 
         if self.NPNormals is not None and len(self.NPNormals) > 0:
-            self.Normals = [None] * self.NumVertices
-            for wedge_id, rgb in enumerate(self.NPNormals['xyz']):
-                self.Normals[wedge_id] = rgb
+            self.Normals = self.NPNormals['xyz']
+            if self.Welded:
+                # welded vertices keep the wedge normals as custom loop normals, so hard edges survive.
+                if len(self.Normals) != len(self.NPWedges):
+                    self.Normals = self.Normals[wedge_points]
+                self.Normals = self.Normals[loops]
 
         if self.NPTangents is not None and len(self.NPTangents) > 0:
-            self.Tangents = [None] * self.NumVertices
-            for wedge_id, rgb in enumerate(self.NPTangents['xyzw']):
-                self.Tangents[wedge_id] = rgb
+            self.Tangents = self.NPTangents['xyzw']
 
         if has_materials:
             self.NumMaterials = len(self.NPMaterials)
@@ -207,81 +290,206 @@ class Mesh:
 
         if self.NPBones is not None and len(self.NPBones) > 0:
             self.NumBones = len(self.NPBones)
-            self.Bones = [None] * self.NumBones
-            for bone_id, (bone_name, flags, num_children, parent_id, rot, pos, length, scale) in enumerate(self.NPBones):
-                self.Bones[bone_id] = (fix_string_np(bone_name), parent_id, Quaternion((rot[3], rot[0], rot[1], rot[2])), Vector((pos[0], pos[1], pos[2])) * resize_by, Vector((scale[0], scale[1], scale[2])) * resize_by)
+            self.Bones = Skeleton(self.NPBones, resize_by, resize_by)
 
         if self.NPWeights is not None and len(self.NPWeights) > 0:
-            self.Weights = self.NPWeights.tolist()
+            self.Weights = self.NPWeights
 
         if self.NPSockets is not None and len(self.NPSockets) > 0:
             self.NumSockets = len(self.NPSockets)
             self.Sockets = [None] * self.NumSockets
             for socket_id, (socket_name, bone_name, pos, rot, scale) in enumerate(self.NPSockets):
-                self.Sockets[socket_id] = (fix_string_np(socket_name), fix_string_np(bone_name), Vector((pos[0], pos[1], pos[2])) * resize_by, Vector((rot[0], rot[1], rot[2])), Vector((scale[0], scale[1], scale[2])) * resize_by)
+                self.Sockets[socket_id] = (fix_string_np(socket_name), fix_string_np(bone_name), (pos * resize_by).tolist(), rot.tolist(), (scale * resize_by).tolist())
 
         if self.NPColors is not None and len(self.NPColors) > 0:
-            self.Colors = [None] * self.NumFaces * 3
-            NPColorsFloat = (self.NPColors['rgba'] / 0xff).tolist()
-            for face_id, (a, b, c) in enumerate(self.Faces):
-                self.Colors[face_id * 3] = NPColorsFloat[a]
-                self.Colors[face_id * 3 + 1] = NPColorsFloat[b]
-                self.Colors[face_id * 3 + 2] = NPColorsFloat[c]
+            # colors are stored per wedge, which is per vertex unless wedges are welded into points.
+            self.Colors = self.NPColors['rgba']
+            if self.Welded:
+                loop_colors: ndarray = self.Colors[loops]
+                self.Colors = numpy.zeros((self.NumVertices, 4), dtype=numpy.uint8)
+                self.Colors[self.Faces.ravel()] = loop_colors
+                if not numpy.array_equal(self.Colors[self.Faces.ravel()], loop_colors):
+                    self.CornerColors = True
+                    self.Colors = loop_colors
 
         if self.NPUVs is not None and len(self.NPUVs) > 0:
-            for uv_id, NPUV in enumerate(self.NPUVs):
-                NPExtraUV = (NPUV['uv'] * [(1.0, -1.0)] + [(0.0, 1.0)]).tolist()
-                ExtraUV = [None] * self.NumFaces * 3
-                for face_id, (a, b, c) in enumerate(self.Faces):
-                    ExtraUV[face_id * 3 + 0] = NPExtraUV[a]
-                    ExtraUV[face_id * 3 + 1] = NPExtraUV[b]
-                    ExtraUV[face_id * 3 + 2] = NPExtraUV[c]
-                self.UVs.append(ExtraUV)
+            for uv_id, NPUV in sorted(self.NPUVs.items()):
+                self.UVs.append(convert_uv(NPUV['uv'], loops))
         self.NumUVs = len(self.UVs)
 
         if self.NPShapeKeys is not None and self.NPShapeNames is not None and len(self.NPShapeKeys) > 0 and len(self.NPShapeNames) > 0:
             self.NumShapes = len(self.NPShapeKeys)
-            for shape_id, shape_data in enumerate(self.NPShapeKeys):
-                shape_data['xyz'] *= resize_by
+            point_vertices: tuple[ndarray, ndarray, ndarray] = self.get_point_vertices()
+            for shape_id, shape_data in sorted(self.NPShapeKeys.items()):
+                if shape_id >= len(self.NPShapeNames):
+                    log_error('ACTORX', 'Morph target %d has no name!' % (shape_id))
+                    continue
                 shape_name = fix_string_np(self.NPShapeNames['name'][shape_id])
-                self.ShapeKeys[shape_name] = self.Vertices.copy()
-                for vertex_id, shape_delta in shape_data.tolist():
-                    self.ShapeKeys[shape_name][int(vertex_id)] = shape_delta
+                shape_wedges: ndarray = shape_data['vertex_id'].astype(numpy.int64)
+                shape_positions: ndarray = shape_data['xyz']
+                valid: ndarray = (shape_wedges >= 0) & (shape_wedges < len(wedge_points))
+                if not numpy.all(valid):
+                    log_error('ACTORX', 'Morph target %s moves %d missing wedges!' % (shape_name, len(valid) - numpy.count_nonzero(valid)))
+                    shape_wedges = shape_wedges[valid]
+                    shape_positions = shape_positions[valid]
+
+                # morph targets index wedges, they are folded onto points like the weights. wedges of the same point
+                # share its position, so a point takes the average of its moved wedges.
+                (shape_points, inverse) = numpy.unique(wedge_points[shape_wedges], return_inverse=True)
+                inverse = inverse.ravel()
+                wedge_counts: ndarray = numpy.bincount(inverse, minlength=len(shape_points))
+                point_positions: ndarray = numpy.stack([numpy.bincount(inverse, weights=shape_positions[:, axis], minlength=len(shape_points)) for axis in range(3)], axis=-1)
+                point_positions /= wedge_counts[:, numpy.newaxis]
+
+                (shape_ids, repeats) = expand_points(point_vertices, shape_points)
+                shape_deltas: ndarray = (numpy.repeat(point_positions, repeats, axis=0) * resize_by).astype(numpy.float32)
+                shape_deltas -= self.Vertices[shape_ids]
+                self.ShapeKeys[shape_name] = (shape_ids, shape_deltas)
 
         if self.NPPhysics is not None and len(self.NPPhysics) > 0:
             self.NumHitboxes = len(self.NPPhysics)
             # todo(ada): physics
 
+    def get_valid_faces(self, wedge_points: ndarray, wedge_loops: ndarray, bad_wedges: ndarray) -> ndarray:
+        # ids of the faces worth building, in file order. faces that reference missing wedges or points, reuse a
+        # vertex or repeat an earlier face are dropped, which covers everything blender's validate would remove.
+        num_wedges: int = len(wedge_points)
+        valid: ndarray = numpy.all((wedge_loops >= 0) & (wedge_loops < num_wedges), axis=1)
+        if not numpy.all(valid):
+            self.Repairs.append('%d faces pointing to missing wedges dropped' % (len(valid) - numpy.count_nonzero(valid)))
+        if num_wedges == 0:
+            return numpy.flatnonzero(valid)
+
+        corners: ndarray = numpy.where(valid[:, None], wedge_loops, 0)
+        missing: ndarray = valid & numpy.any(bad_wedges[corners], axis=1)
+        if numpy.any(missing):
+            self.Repairs.append('%d faces on wedges without a point dropped' % (numpy.count_nonzero(missing)))
+            valid &= ~missing
+
+        # welded meshes are built on the points, so corners only collapse when they share one.
+        if self.Welded:
+            corners = wedge_points[corners]
+        degenerate: ndarray = valid & ((corners[:, 0] == corners[:, 1]) | (corners[:, 1] == corners[:, 2]) | (corners[:, 0] == corners[:, 2]))
+        if numpy.any(degenerate):
+            self.Repairs.append('%d degenerate faces dropped' % (numpy.count_nonzero(degenerate)))
+            valid &= ~degenerate
+
+        face_ids: ndarray = numpy.flatnonzero(valid)
+        (_, first_faces) = numpy.unique(numpy.sort(corners[face_ids], axis=1), axis=0, return_index=True)
+        if len(first_faces) < len(face_ids):
+            self.Repairs.append('%d duplicate faces dropped' % (len(face_ids) - len(first_faces)))
+            face_ids = face_ids[numpy.sort(first_faces)]
+        return face_ids
+
+    def expand_shape_key(self, shape_name: str, out: ndarray | None = None) -> ndarray:
+        # pass the same float32 (vertices, 3) buffer for every shape to keep only one dense shape alive.
+        (shape_ids, shape_deltas) = self.ShapeKeys[shape_name]
+        if out is None:
+            out = self.Vertices.copy()
+        else:
+            numpy.copyto(out, self.Vertices)
+        out[shape_ids] += shape_deltas
+        return out
+
+    def get_point_vertices(self) -> tuple[ndarray, ndarray, ndarray]:
+        # CSR from points to the vertices made from them: (vertex ids sorted by point, first entry, count) per point.
+        vertex_order: ndarray = numpy.argsort(self.VertexPoints, kind='stable')
+        point_counts: ndarray = numpy.bincount(self.VertexPoints, minlength=self.NumPoints)
+        point_starts: ndarray = numpy.cumsum(point_counts) - point_counts
+        return (vertex_order, point_starts, point_counts)
+
+    def get_weight_groups(self) -> list[tuple[int, float, ndarray]]:
+        # (bone id, weight, int32 vertex ids) for every distinct weight of every bone, so a vertex group takes
+        # one call per weight instead of one per record. weights are quantized to 16 bits, which keeps 8 and 16 bit
+        # source weights exact.
+        if self.Weights is None or len(self.Weights) == 0 or self.NumBones == 0:
+            return []
+
+        # weights index points, like the morph targets once they are folded in finalize.
+        weights: ndarray = self.Weights['weight'].astype(numpy.float64)
+        points: ndarray = self.Weights['vertex_id'].astype(numpy.int64)
+        bones: ndarray = self.Weights['bone_id'].astype(numpy.int64)
+        in_range: ndarray = (points >= 0) & (points < self.NumPoints) & (bones >= 0) & (bones < self.NumBones)
+        if not numpy.all(in_range):
+            log_error('ACTORX', '%d weights point to missing vertices or bones!' % (len(in_range) - numpy.count_nonzero(in_range)))
+
+        # zero weights are valid records that don't influence anything.
+        valid: ndarray = in_range & (weights > 0.0)
+        if not numpy.any(valid):
+            return []
+
+        # duplicate records for the same point and bone add up.
+        (influences, inverse) = numpy.unique(points[valid] * self.NumBones + bones[valid], return_inverse=True)
+        summed: ndarray = numpy.bincount(inverse.ravel(), weights=weights[valid])
+        (points, bones) = numpy.divmod(influences, self.NumBones)
+
+        # every vertex made from a point gets its weights.
+        (vertices, repeats) = expand_points(self.get_point_vertices(), points)
+        bones = numpy.repeat(bones, repeats)
+        quantized: ndarray = numpy.repeat(numpy.rint(numpy.clip(summed, 0.0, 1.0) * 0xffff).astype(numpy.int64), repeats)
+
+        order: ndarray = numpy.lexsort((vertices, quantized, bones))
+        groups: ndarray = bones[order] * 0x10000 + quantized[order]
+        boundaries: ndarray = numpy.flatnonzero(numpy.diff(groups)) + 1
+        starts: ndarray = numpy.concatenate(([0], boundaries))
+        ends: ndarray = numpy.concatenate((boundaries, [len(order)]))
+        return [(int(group >> 16), (group & 0xffff) / 0xffff, vertices[order[start:end]]) for group, start, end in zip(groups[starts].tolist(), starts.tolist(), ends.tolist())]
+
+    def release(self):
+        # drops the raw chunks and the source buffer, the finalized arrays keep alive whatever they still view.
+        self.Source = None
+        self.NPPoints = None
+        self.NPWedges = None
+        self.NPFaces = None
+        self.NPNormals = None
+        self.NPTangents = None
+        self.NPMaterials = None
+        self.NPBones = None
+        self.NPWeights = None
+        self.NPColors = None
+        self.NPUVs = {}
+        self.NPShapeKeys = {}
+        self.NPShapeNames = None
+        self.NPPhysics = None
+        self.NPSockets = None
+
 
 class Animation:
+    __slots__ = ('Source', 'NumSequences', 'NumBones', 'NumKeys', 'Sequences', 'Bones', 'SequenceKeys', 'SequenceTimes', 'NPSequences', 'NPBones', 'NPKeys')
+
     TYPE: DataType = DataType.Animation
+    Source: mmap.mmap | memoryview | bytes | None
 
     NumSequences: int
     NumBones: int
     NumKeys: int
 
     Sequences: list[tuple[str, str, int, int, float]] | None
-    Bones: list[tuple[str, int, Quaternion, Vector, Vector]] | None
-    Keys: list[tuple[float, Vector, Quaternion]] | None
+    Bones: Skeleton | None
+    SequenceKeys: list[ndarray] | None  # per sequence, float32 (frames, bones, 7) = scaled position, w-first rotation
+    SequenceTimes: list[ndarray] | None  # per sequence, float32 (frames, bones) keyframe time starting at 1
 
     NPSequences: ndarray | None
     NPBones: ndarray | None
     NPKeys: ndarray | None
 
     def __init__(self):
+        self.Source = None
         self.NumSequences = 0
         self.NumBones = 0
         self.NumKeys = 0
 
         self.Sequences = None
         self.Bones = None
-        self.Keys = None
+        self.SequenceKeys = None
+        self.SequenceTimes = None
 
         self.NPSequences = None
         self.NPBones = None
         self.NPKeys = None
 
-    def __setitem__(self, key: str, value: ndarray):
+    def __setitem__(self, chunk: tuple[str, tuple[int, ...]], value: ndarray):
+        (key, index) = chunk
         if len(value) == 0:
             return
 
@@ -292,7 +500,7 @@ class Animation:
         elif key == 'ANIMKEYS':
             self.NPKeys = value
 
-    def finalize(self, settings: dict[str, Property]):
+    def finalize(self, settings: dict[str, typing.Any]):
         resize_by: float = settings['resize_by'] if 'resize_by' in settings else 0.01
 
         self.NumSequences = len(self.NPSequences)
@@ -301,39 +509,107 @@ class Animation:
             self.Sequences[sequence_id] = (fix_string_np(name), fix_string_np(group), total_bones, raw_frames, framerate)
 
         self.NumBones = len(self.NPBones)
-        self.Bones = [None] * self.NumBones
-        for bone_id, (bone_name, flags, num_children, parent_id, rot, pos, length, scale) in enumerate(self.NPBones):
-            self.Bones[bone_id] = (fix_string_np(bone_name), parent_id, Quaternion((rot[3], rot[0], rot[1], rot[2])), Vector((pos[0], pos[1], pos[2])) * resize_by, Vector((scale[0], scale[1], scale[2])) * resize_by)
+        self.Bones = Skeleton(self.NPBones, resize_by, resize_by)
 
         self.NumKeys = len(self.NPKeys)
-        self.Keys = [None] * self.NumKeys
+        self.SequenceKeys = [None] * self.NumSequences
+        self.SequenceTimes = [None] * self.NumSequences
+
+        for sequence_id, (total_bones, first_frame, num_frames) in enumerate(zip(self.NPSequences['total_bones'].tolist(), self.NPSequences['first_frame'].tolist(), self.NPSequences['num_frames'].tolist())):
+            first_key = first_frame * total_bones
+            num_frames = max(min(num_frames, (self.NumKeys - first_key) // max(total_bones, 1)), 0)
+            if num_frames != self.Sequences[sequence_id][3]:
+                log_error('ACTORX', 'Sequence %s is missing keys!' % (self.Sequences[sequence_id][0]))
+                (name, group, _, _, framerate) = self.Sequences[sequence_id]
+                self.Sequences[sequence_id] = (name, group, total_bones, num_frames, framerate)
+
+            keys: ndarray = self.NPKeys[first_key:first_key + num_frames * total_bones]
+            sequence_keys: ndarray = numpy.empty((num_frames, total_bones, 7), dtype=numpy.float32)
+            sequence_keys[:, :, :3] = keys['pos'].reshape((num_frames, total_bones, 3)) * resize_by
+            sequence_keys[:, :, 3:] = keys['rot'].reshape((num_frames, total_bones, 4))[:, :, (3, 0, 1, 2)]
+            self.SequenceKeys[sequence_id] = sequence_keys
+
+            # each key stores its own duration, so a key starts where the previous keys of the same bone ended.
+            durations: ndarray = keys['time'].reshape((num_frames, total_bones))
+            sequence_times: ndarray = numpy.cumsum(durations, axis=0, dtype=numpy.float32)
+            sequence_times -= durations
+            sequence_times += 1.0
+            self.SequenceTimes[sequence_id] = sequence_times
+
+    def release(self):
+        self.Source = None
+        self.NPSequences = None
+        self.NPBones = None
+        self.NPKeys = None
+
+
+class Track:
+    __slots__ = ('Offsets', 'Times', 'Values')
 
-        for key_id, (pos, rot, time) in enumerate(self.NPKeys.tolist()):
-            self.Keys[key_id] = (time, Vector(pos) * resize_by, Quaternion((rot[3], rot[0], rot[1], rot[2])))
+    # CSR layout, the keys of bone i are Times[Offsets[i]:Offsets[i + 1]] and Values[Offsets[i]:Offsets[i + 1]].
+    Offsets: ndarray  # int64 (bones + 1,)
+    Times: ndarray  # float32 (keys,)
+    Values: ndarray  # float32 (keys, components)
+
+    def __init__(self, tracks: dict[int, ndarray], num_bones: int, field: str, components: int):
+        lengths: ndarray = numpy.zeros(num_bones, dtype=numpy.int64)
+        for bone_id, track in tracks.items():
+            if bone_id < num_bones:
+                lengths[bone_id] = len(track)
+
+        self.Offsets = numpy.zeros(num_bones + 1, dtype=numpy.int64)
+        numpy.cumsum(lengths, out=self.Offsets[1:])
+        self.Times = numpy.empty(self.Offsets[-1], dtype=numpy.float32)
+        self.Values = numpy.empty((self.Offsets[-1], components), dtype=numpy.float32)
+
+        for bone_id, track in tracks.items():
+            if bone_id < num_bones:
+                start = self.Offsets[bone_id]
+                end = self.Offsets[bone_id + 1]
+                self.Times[start:end] = track['time']
+                self.Values[start:end] = track[field]
+
+    def __getitem__(self, bone_id: int) -> tuple[ndarray, ndarray]:
+        start = self.Offsets[bone_id]
+        end = self.Offsets[bone_id + 1]
+        return (self.Times[start:end], self.Values[start:end])
+
+    def __len__(self) -> int:
+        return len(self.Offsets) - 1
+
+    def lengths(self) -> ndarray:
+        return numpy.diff(self.Offsets)
 
 
 class AnimationV2:
+    __slots__ = ('Source', 'NumSequences', 'NumBones', 'SequenceName', 'Additive', 'ResizeBy', 'Bones', 'SequenceNames', 'FrameRates', 'AdditiveModes', 'PosTracks', 'RotTracks', 'SclTracks',
+                 'NPBones', 'NPSequences', 'NPPosTracks', 'NPRotTracks', 'NPSclTracks')
+
     TYPE: DataType = DataType.AnimationV2
+    Source: mmap.mmap | memoryview | bytes | None
 
+    NumSequences: int
     NumBones: int
 
     SequenceName: str | None
     Additive: bool
     ResizeBy: float
-    Bones: list[tuple[str, int, Quaternion, Vector, Vector]] | None
-    PosKeys: list[list[tuple[float, Vector]]] | None
-    SclKeys: list[list[tuple[float, Quaternion]]] | None
-    RotKeys: list[list[tuple[float, Quaternion]]] | None
-    PosKeyLength = list[int]
-    SclKeyLength = list[int]
-    RotKeyLength = list[int]
+    Bones: Skeleton | None
+    SequenceNames: list[str] | None
+    FrameRates: ndarray | None
+    AdditiveModes: ndarray | None
+    PosTracks: list[Track] | None  # per sequence, values are scaled positions.
+    RotTracks: list[Track] | None  # per sequence, values are w-first quaternions.
+    SclTracks: list[Track] | None  # per sequence.
 
     NPBones: ndarray | None
     NPSequences: ndarray | None
-    NPPosTracks: list[list[ndarray]] | None
-    NPRotTracks: list[list[ndarray]] | None
+    NPPosTracks: dict[tuple[int, int], ndarray]
+    NPRotTracks: dict[tuple[int, int], ndarray]
+    NPSclTracks: dict[tuple[int, int], ndarray]
 
     def __init__(self):
+        self.Source = None
         self.NumSequences = 0
         self.NumBones = 0
 
@@ -341,76 +617,121 @@ class AnimationV2:
         self.Additive = False
         self.ResizeBy = 1.0
         self.Bones = None
-        self.PosKeys = None
-        self.RotKeys = None
-        self.PosKeyLength = None
-        self.RotKeyLength = None
+        self.SequenceNames = None
+        self.FrameRates = None
+        self.AdditiveModes = None
+        self.PosTracks = None
+        self.RotTracks = None
+        self.SclTracks = None
 
         self.NPBones = None
         self.NPSequences = None
-        self.NPPosTracks = list()
-        self.NPSclTracks = list()
-        self.NPRotTracks = list()
+        self.NPPosTracks = {}
+        self.NPSclTracks = {}
+        self.NPRotTracks = {}
 
-    def __setitem__(self, key: str, value: ndarray):
+    def __setitem__(self, chunk: tuple[str, tuple[int, ...]], value: ndarray):
+        (key, index) = chunk
         if key == 'REFSKELT' or key == 'REFSKEL0' or key == 'BONENAMES':
             self.NPBones = value
         elif key == 'SEQUENCES':
             self.NPSequences = value
-        elif key[:8] == 'POSTRACK':
-            self.NPPosTracks.append(value)
-        elif key[:8] == 'ROTTRACK':
-            self.NPRotTracks.append(value)
-        elif key[:8] == 'SCLTRACK':
-            self.NPSclTracks.append(value)
-
-    def finalize(self, settings: dict[str, Property]):
+        elif key == 'POSTRACK':
+            self.NPPosTracks[self.get_track_index(self.NPPosTracks, index)] = value
+        elif key == 'ROTTRACK':
+            self.NPRotTracks[self.get_track_index(self.NPRotTracks, index)] = value
+        elif key == 'SCLTRACK':
+            self.NPSclTracks[self.get_track_index(self.NPSclTracks, index)] = value
+
+    @staticmethod
+    def get_track_index(tracks: dict[tuple[int, int], ndarray], index: tuple[int, ...]) -> tuple[int, int]:
+        if len(index) == 2:
+            return index
+
+        # tracks without a sequence:bone suffix are taken in arrival order, as the next bone of the first sequence.
+        return (0, max((bone_id + 1 for sequence_id, bone_id in tracks if sequence_id == 0), default=0))
+
+    @staticmethod
+    def get_sequence_tracks(tracks: dict[tuple[int, int], ndarray], sequence_id: int) -> dict[int, ndarray]:
+        return {bone_id: track for (track_sequence_id, bone_id), track in tracks.items() if track_sequence_id == sequence_id}
+
+    def finalize(self, settings: dict[str, typing.Any]):
         resize_by: float = settings['resize_by'] if 'resize_by' in settings else 0.01
 
         self.NumBones = len(self.NPBones)
-        self.Bones = [None] * self.NumBones
-        for bone_id, (bone_name, flags, num_children, parent_id, rot, pos, length, scale) in enumerate(self.NPBones):
-            self.Bones[bone_id] = (fix_string_np(bone_name), parent_id, Quaternion((rot[3], rot[0], rot[1], rot[2])), Vector(pos) * resize_by, Vector(scale))
+        self.Bones = Skeleton(self.NPBones, resize_by, 1.0)
 
-        self.SequenceName = fix_string_np(self.NPSequences[0]['name'])
-        self.Additive = bool(self.NPSequences[0]['additive'])
-
-        self.PosKeys = [None] * self.NumBones
-        self.SclKeys = [None] * self.NumBones
-        self.RotKeys = [None] * self.NumBones
-        self.PosKeyLength = [len(keys) for keys in self.NPPosTracks]
-        self.SclKeyLength = [len(keys) for keys in self.NPSclTracks]
-        self.RotKeyLength = [len(keys) for keys in self.NPRotTracks]
+        self.NumSequences = len(self.NPSequences)
+        self.SequenceNames = [fix_string_np(name) for name in self.NPSequences['name']]
+        self.FrameRates = self.NPSequences['framerate'].astype(numpy.float32)
+        self.AdditiveModes = self.NPSequences['additive'].astype(numpy.int32)
+        self.SequenceName = self.SequenceNames[0]
+        self.Additive = bool(self.AdditiveModes[0])
 
         self.ResizeBy = resize_by
 
-        for bone_id in range(self.NumBones):
-            NBBonePosKeys: list[tuple[time, list[float]]] = self.NPPosTracks[bone_id].tolist()
-            self.PosKeys[bone_id] = [None] * len(NBBonePosKeys)
-            for pos_id, (time, pos) in enumerate(NBBonePosKeys):
-                self.PosKeys[bone_id][pos_id] = (time, Vector(pos) * resize_by)
+        self.PosTracks = [None] * self.NumSequences
+        self.RotTracks = [None] * self.NumSequences
+        self.SclTracks = [None] * self.NumSequences
+        for sequence_id in range(self.NumSequences):
+            self.PosTracks[sequence_id] = Track(self.get_sequence_tracks(self.NPPosTracks, sequence_id), self.NumBones, 'xyz', 3)
+            self.PosTracks[sequence_id].Values *= resize_by
 
-            if len(self.NPSclTracks) > bone_id:
-                NBBoneSclKeys: list[tuple[time, list[float]]] = self.NPSclTracks[bone_id].tolist()
-                self.SclKeys[bone_id] = [None] * len(NBBoneSclKeys)
-                for Scl_id, (time, Scl) in enumerate(NBBoneSclKeys):
-                    self.SclKeys[bone_id][Scl_id] = (time, Vector(Scl))
+            self.RotTracks[sequence_id] = Track(self.get_sequence_tracks(self.NPRotTracks, sequence_id), self.NumBones, 'xyzw', 4)
+            self.RotTracks[sequence_id].Values = self.RotTracks[sequence_id].Values[:, (3, 0, 1, 2)]
 
-            NBBoneRotKeys: list[tuple[time, list[float]]] = self.NPRotTracks[bone_id].tolist()
-            self.RotKeys[bone_id] = [None] * len(NBBoneRotKeys)
-            for rot_id, (time, rot) in enumerate(NBBoneRotKeys):
-                self.RotKeys[bone_id][rot_id] = (time, Quaternion((rot[3], rot[0], rot[1], rot[2])))
+            self.SclTracks[sequence_id] = Track(self.get_sequence_tracks(self.NPSclTracks, sequence_id), self.NumBones, 'xyz', 3)
+
+    def release(self):
+        self.Source = None
+        self.NPBones = None
+        self.NPSequences = None
+        self.NPPosTracks = {}
+        self.NPRotTracks = {}
+        self.NPSclTracks = {}
 
 
 class World:
+    __slots__ = ('Source', 'NumActors', 'NumLights',
+                 'ActorNames', 'ActorAssets', 'ActorParents', 'ActorPositions', 'ActorRotations', 'ActorScales', 'ActorNoShadow', 'ActorHidden', 'ActorUseTemperature', 'ActorIsStatic',
+                 'LightActors', 'LightColors', 'LightTypes', 'LightSizes', 'LightAttenuations', 'LightRadii', 'LightTemperatures', 'LightBiases', 'LightLumens', 'LightAngles',
+                 'OverrideOffsets', 'OverrideMaterialIds', 'OverrideNames', 'Landscapes',
+                 'NPActors', 'NPLights', 'NPMaterials', 'NPLandscapes')
+
     TYPE: DataType = DataType.World
+    Source: mmap.mmap | memoryview | bytes | None
 
     NumActors: int
-
-    Actors: list[tuple[str, str, int, Vector, Quaternion, Vector, bool, bool, bool, bool]]  # bools = no shadow, hidden, use_temp, is_static
-    Lights: list[tuple[int, Color, int, Vector, float, float, float, float, float, float]]
-    OverrideMaterials: list[dict[int, str]]
-    Landscapes: list[tuple[str, int, Vector, int, int, int, int, float, Vector, Vector]]  # name, actor, pos, size, type, x, y, bias, offset, dim
+    NumLights: int
+
+    ActorNames: list[str]
+    ActorAssets: list[str]
+    ActorParents: ndarray  # int32 (actors,), -1 for root actors
+    ActorPositions: ndarray  # float32 (actors, 3), scaled
+    ActorRotations: ndarray  # float32 (actors, 4), w-first
+    ActorScales: ndarray  # float32 (actors, 3)
+    ActorNoShadow: ndarray  # bool (actors,), flag 1
+    ActorHidden: ndarray  # bool (actors,), flag 2
+    ActorUseTemperature: ndarray  # bool (actors,), flag 4
+    ActorIsStatic: ndarray  # bool (actors,), flag 8 marks skeletal actors
+
+    LightActors: ndarray  # int32 (lights,)
+    LightColors: ndarray  # float32 (lights, 3)
+    LightTypes: ndarray  # int32 (lights,)
+    LightSizes: ndarray  # float32 (lights, 3), scaled width, height, length
+    LightAttenuations: ndarray  # float32 (lights,)
+    LightRadii: ndarray  # float32 (lights,)
+    LightTemperatures: ndarray  # float32 (lights,)
+    LightBiases: ndarray  # float32 (lights,)
+    LightLumens: ndarray  # float32 (lights,)
+    LightAngles: ndarray  # float32 (lights,)
+
+    # CSR layout sorted by material id, the overrides of actor i are OverrideMaterialIds[OverrideOffsets[i]:OverrideOffsets[i + 1]].
+    OverrideOffsets: ndarray  # int64 (actors + 1,)
+    OverrideMaterialIds: ndarray  # int32 (overrides,)
+    OverrideNames: list[str]
+
+    Landscapes: list[tuple[str, int, tuple[float, float, float], int, int, int, int, float, tuple[float, float, float], tuple[float, float, float]]]  # name, actor, pos, size, type, x, y, bias, offset, dim
 
     NPActors: ndarray
     NPLights: ndarray
@@ -418,11 +739,36 @@ class World:
     NPLandscapes: ndarray | None
 
     def __init__(self):
+        self.Source = None
         self.NumActors = 0
+        self.NumLights = 0
+
+        self.ActorNames = []
+        self.ActorAssets = []
+        self.ActorParents = numpy.empty(0, dtype=numpy.int32)
+        self.ActorPositions = numpy.empty((0, 3), dtype=numpy.float32)
+        self.ActorRotations = numpy.empty((0, 4), dtype=numpy.float32)
+        self.ActorScales = numpy.empty((0, 3), dtype=numpy.float32)
+        self.ActorNoShadow = numpy.empty(0, dtype=bool)
+        self.ActorHidden = numpy.empty(0, dtype=bool)
+        self.ActorUseTemperature = numpy.empty(0, dtype=bool)
+        self.ActorIsStatic = numpy.empty(0, dtype=bool)
+
+        self.LightActors = numpy.empty(0, dtype=numpy.int32)
+        self.LightColors = numpy.empty((0, 3), dtype=numpy.float32)
+        self.LightTypes = numpy.empty(0, dtype=numpy.int32)
+        self.LightSizes = numpy.empty((0, 3), dtype=numpy.float32)
+        self.LightAttenuations = numpy.empty(0, dtype=numpy.float32)
+        self.LightRadii = numpy.empty(0, dtype=numpy.float32)
+        self.LightTemperatures = numpy.empty(0, dtype=numpy.float32)
+        self.LightBiases = numpy.empty(0, dtype=numpy.float32)
+        self.LightLumens = numpy.empty(0, dtype=numpy.float32)
+        self.LightAngles = numpy.empty(0, dtype=numpy.float32)
+
+        self.OverrideOffsets = numpy.zeros(1, dtype=numpy.int64)
+        self.OverrideMaterialIds = numpy.empty(0, dtype=numpy.int32)
+        self.OverrideNames = []
 
-        self.Actors = []
-        self.Lights = []
-        self.OverrideMaterials = []
         self.Landscapes = []
 
         self.NPActors = None
@@ -430,11 +776,10 @@ class World:
         self.NPMaterials = None
         self.NPLandscapes = None
 
-    def __setitem__(self, key: str, value: ndarray):
+    def __setitem__(self, chunk: tuple[str, tuple[int, ...]], value: ndarray):
+        (key, index) = chunk
         if key == 'WORLDACTORS':
             self.NPActors = value
-        elif key == 'WORLDACTORS::2':
-            self.NPActors = value
         elif key == 'WORLDLIGHTS':
             self.NPLights = value
         elif key == 'INSTMATERIAL':
@@ -442,69 +787,468 @@ class World:
         elif key == 'LANDSCAPE':
             self.NPLandscapes = value
 
-    def finalize(self, settings: dict[str, Property]):
+    def finalize(self, settings: dict[str, typing.Any]):
         resize_by: float = settings['resize_by'] if 'resize_by' in settings else 0.01
 
         if self.NPActors is not None and len(self.NPActors) > 0:
             self.NumActors = len(self.NPActors)
-            """
-            x[6] = 
-                1 = NoShadow
-                2 = Hidden
-                4 = UseTemperature
-                8 = IsSkeleton 
-            """
-            self.Actors = [(fix_string_np(x[0]), fix_string_np(x[1]), int(x[2]), Vector(x[3]) * resize_by, Quaternion((x[4][3], x[4][0], x[4][1], x[4][2])), Vector(x[5]), x[6] & 1 == 1, x[6] & 2 == 2, x[6] & 4 == 4, x[6] & 8 == 0) for x in self.NPActors]
-        
-            if self.NPLights is not None and len(self.NPLights) > 0:
-                self.Lights = [(x['parent'], Color((x['color'][0] / 255, x['color'][1] / 255, x['color'][2] / 255)), int(x['type']), Vector(x['whl']) * resize_by, x['attenuation'], x['radius'], x['temp'], x['bias'], x['lumens'], x['angle']) for x in self.NPLights]
+            self.ActorNames = fix_strings_np(self.NPActors['name'])
+            self.ActorAssets = fix_strings_np(self.NPActors['asset'])
+            self.ActorParents = self.NPActors['parent'].astype(numpy.int32)
+            self.ActorPositions = self.NPActors['pos'] * numpy.float32(resize_by)
+            self.ActorRotations = self.NPActors['rot'][:, (3, 0, 1, 2)].astype(numpy.float32)
+            self.ActorScales = self.NPActors['scale'].astype(numpy.float32)
+
+            flags: ndarray = self.NPActors['flags']
+            self.ActorNoShadow = flags & 1 != 0
+            self.ActorHidden = flags & 2 != 0
+            self.ActorUseTemperature = flags & 4 != 0
+            self.ActorIsStatic = flags & 8 == 0
 
-            self.OverrideMaterials = [{}] * self.NumActors
+            if self.NPLights is not None and len(self.NPLights) > 0:
+                self.NumLights = len(self.NPLights)
+                self.LightActors = self.NPLights['parent'].astype(numpy.int32)
+                self.LightColors = self.NPLights['color'][:, :3].astype(numpy.float32) / 0xff
+                self.LightTypes = self.NPLights['type'].astype(numpy.int32)
+                self.LightSizes = self.NPLights['whl'] * numpy.float32(resize_by)
+                self.LightAttenuations = self.NPLights['attenuation'].astype(numpy.float32)
+                self.LightRadii = self.NPLights['radius'].astype(numpy.float32)
+                self.LightTemperatures = self.NPLights['temp'].astype(numpy.float32)
+                self.LightBiases = self.NPLights['bias'].astype(numpy.float32)
+                self.LightLumens = self.NPLights['lumens'].astype(numpy.float32)
+                self.LightAngles = self.NPLights['angle'].astype(numpy.float32)
+
+            self.OverrideOffsets = numpy.zeros(self.NumActors + 1, dtype=numpy.int64)
             if self.NPMaterials is not None and len(self.NPMaterials) > 0:
-                for (actor_id, material_id, material_name) in self.NPMaterials:
-                    self.OverrideMaterials[actor_id][material_id] = fix_string_np(material_name)
+                actor_ids: ndarray = self.NPMaterials['actor_id']
+                material_ids: ndarray = self.NPMaterials['material_id']
+                valid: ndarray = numpy.flatnonzero((actor_ids >= 0) & (actor_ids < self.NumActors))
+                if len(valid) < len(actor_ids):
+                    log_error('ACTORX', '%d material overrides point to missing actors!' % (len(actor_ids) - len(valid)))
+
+                # group by actor then material, a later override of the same slot replaces the earlier one.
+                order: ndarray = valid[numpy.lexsort((valid, material_ids[valid], actor_ids[valid]))]
+                sorted_actors: ndarray = actor_ids[order]
+                sorted_materials: ndarray = material_ids[order]
+                last: ndarray = numpy.ones(len(order), dtype=bool)
+                last[:-1] = (sorted_actors[1:] != sorted_actors[:-1]) | (sorted_materials[1:] != sorted_materials[:-1])
+                order = order[last]
+
+                numpy.cumsum(numpy.bincount(actor_ids[order], minlength=self.NumActors), out=self.OverrideOffsets[1:])
+                self.OverrideMaterialIds = material_ids[order].astype(numpy.int32)
+                self.OverrideNames = fix_strings_np(self.NPMaterials['name'][order])
 
         if self.NPLandscapes is not None and len(self.NPLandscapes) > 0:
-            self.Landscapes = [(fix_string_np(x['name']), x['actor_id'], Vector((x['x'], -x['y'], 0)), int(x['size']), x['type'], x['x'], x['y'], x['bias'], Vector((x['offset'][0], x['offset'][1], 0.0)), Vector((x['dim'][0], x['dim'][1], 1.0))) for x in self.NPLandscapes]
+            self.Landscapes = [(fix_string_np(x['name']), x['actor_id'], (x['x'], -x['y'], 0), int(x['size']), x['type'], x['x'], x['y'], x['bias'], (x['offset'][0], x['offset'][1], 0.0), (x['dim'][0], x['dim'][1], 1.0)) for x in self.NPLandscapes]
 
+    def get_override_key(self, actor_id: int) -> tuple[tuple[int, str], ...]:
+        # overrides are sorted by material id, so actors with the same overrides have equal keys.
+        start = self.OverrideOffsets[actor_id]
+        end = self.OverrideOffsets[actor_id + 1]
+        return tuple(zip(self.OverrideMaterialIds[start:end].tolist(), self.OverrideNames[start:end]))
+
+    def release(self):
+        self.Source = None
+        self.NPActors = None
+        self.NPLights = None
+        self.NPMaterials = None
+        self.NPLandscapes = None
+
+
+class ChunkDispatch:
+    # exact chunk ids resolve through a hash lookup, suffixed ids (EXTRAUVS3, ROTTRACK0:57) walk a prefix trie
+    # once and have their suffix parsed into integer indices.
+    exact: dict[str, str]
+    trie: dict[str | None, typing.Any]
+
+    def __init__(self, keys: typing.Iterable[str]):
+        self.exact = {}
+        self.trie = {}
+        for key in keys:
+            self.exact[key] = key
+            node = self.trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[None] = key
+
+    def resolve(self, chunk_id: str) -> tuple[str | None, tuple[int, ...]]:
+        if chunk_id in self.exact:
+            return (chunk_id, ())
+
+        chunk_key: str | None = None
+        node = self.trie
+        for char in chunk_id:
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                chunk_key = node[None]
+
+        if chunk_key is None:
+            return (None, ())
+
+        suffix = chunk_id[len(chunk_key):].split(':')
+        if all(part.isdigit() for part in suffix):
+            return (chunk_key, tuple(int(part) for part in suffix))
+
+        return (chunk_key, ())
 
-def read_chunk(stream: typing.BinaryIO) -> tuple[ndarray | None, str]:
-    (chunk_id, chunk_type, chunk_size, chunk_count) = unpack('20s3i', stream.read(32))
-    chunk_id = fix_string(chunk_id)
-    total_size = chunk_size * chunk_count
 
-    for chunk_key in dispatch.keys():
-        if chunk_key == chunk_id or chunk_id.startswith(chunk_key):
-            return (numpy.fromfile(stream, dtype=dispatch[chunk_key], count=chunk_count), chunk_id)
+dispatch_lookup: ChunkDispatch = ChunkDispatch(dispatch.keys())
 
-    log_error('ACTORX', 'No parser found for %s!' % (chunk_id))
 
-    stream.seek(total_size, 1)
+class Chunk(typing.NamedTuple):
+    id: str
+    key: str | None  # dispatch key, None if there is no parser for it.
+    index: tuple[int, ...]  # numeric suffix of the id, ROTTRACK0:57 = (0, 57)
+    type: int
+    size: int
+    count: int
+    offset: int  # offset of the chunk data, the header sits 32 bytes before it.
 
-    return (None, chunk_id)
+
+def create_chunk(chunk_id: bytes, chunk_type: int, chunk_size: int, chunk_count: int, offset: int) -> Chunk:
+    chunk_id = fix_string(chunk_id)
+    (chunk_key, chunk_index) = dispatch_lookup.resolve(chunk_id)
+    return Chunk(chunk_id, chunk_key, chunk_index, chunk_type, chunk_size, chunk_count, offset)
+
+
+def is_chunk_complete(chunk_id: bytes, chunk_size: int, chunk_count: int, offset: int, size: int) -> bool:
+    # a damaged or truncated file ends the table of contents at the first chunk it can't hold.
+    if chunk_size < 0 or chunk_count < 0 or offset + 32 + chunk_size * chunk_count > size:
+        log_error('ACTORX', 'Chunk %s is truncated!' % (fix_string(chunk_id)))
+        return False
+    return True
 
 
-def read_actorx(stream: typing.BinaryIO, settings: dict[str, Property]) -> Animation | Mesh | None:
-    ob = None
+def read_toc(stream: typing.BinaryIO) -> tuple[str, list[Chunk]]:
+    stream.seek(0, 2)
+    size = stream.tell()
+    stream.seek(0, 0)
+    if size < 32:
+        return ('', [])
+
     magic = fix_string(unpack('20s', stream.read(20))[0])
+    toc: list[Chunk] = []
+    offset = 32
+    while offset + 32 <= size:
+        stream.seek(offset, 0)
+        (chunk_id, chunk_type, chunk_size, chunk_count) = unpack('20s3i', stream.read(32))
+        if not is_chunk_complete(chunk_id, chunk_size, chunk_count, offset, size):
+            break
+        toc.append(create_chunk(chunk_id, chunk_type, chunk_size, chunk_count, offset + 32))
+        offset += 32 + chunk_size * chunk_count
+
+    return (magic, toc)
+
+
+def read_toc_buffer(buffer: mmap.mmap | memoryview | bytes) -> tuple[str, list[Chunk]]:
+    size = len(buffer)
+    if size < 32:
+        return ('', [])
+
+    magic = fix_string(unpack_from('20s', buffer, 0)[0])
+    toc: list[Chunk] = []
+    offset = 32
+    while offset + 32 <= size:
+        (chunk_id, chunk_type, chunk_size, chunk_count) = unpack_from('20s3i', buffer, offset)
+        if not is_chunk_complete(chunk_id, chunk_size, chunk_count, offset, size):
+            break
+        toc.append(create_chunk(chunk_id, chunk_type, chunk_size, chunk_count, offset + 32))
+        offset += 32 + chunk_size * chunk_count
+
+    return (magic, toc)
+
+
+@lru_cache(maxsize=None)
+def get_layout(chunk_key: str, chunk_size: int) -> dtype | None:
+    layouts: list[dtype] = dispatch[chunk_key]
+    for layout in layouts:
+        if layout.itemsize == chunk_size:
+            return layout
+
+    # newer exporters append fields, read the fields we know through a strided view over the larger records.
+    known_layouts = [layout for layout in layouts if layout.itemsize < chunk_size]
+    if len(known_layouts) == 0:
+        return None
+
+    layout = max(known_layouts, key=lambda known_layout: known_layout.itemsize)
+    return dtype({
+            'names':    layout.names,
+            'formats':  [layout.fields[name][0] for name in layout.names],
+            'offsets':  [layout.fields[name][1] for name in layout.names],
+            'itemsize': chunk_size
+    })
+
+
+def get_chunk_layout(chunk: Chunk) -> dtype | None:
+    if chunk.key is None:
+        log_error('ACTORX', 'No parser found for %s!' % (chunk.id))
+        return None
+
+    if chunk.count == 0:
+        return dispatch[chunk.key][0]
+
+    layout = get_layout(chunk.key, chunk.size)
+    if layout is None:
+        log_error('ACTORX', 'No layout for %s fits %d byte records!' % (chunk.id, chunk.size))
+    return layout
+
+
+def clamp_chunk_count(chunk: Chunk, layout: dtype, available: int) -> int:
+    # damaged files can claim more records than they hold, the records that are there are still read.
+    count = max(0, min(chunk.count, available // layout.itemsize))
+    if count < chunk.count:
+        log_warning('ACTORX', 'Chunk %s is truncated, reading %d of %d records!' % (chunk.id, count, chunk.count))
+    return count
+
+
+def read_chunk(stream: typing.BinaryIO, chunk: Chunk) -> ndarray | None:
+    layout = get_chunk_layout(chunk)
+    if layout is None:
+        return None
+
+    stream.seek(chunk.offset, 0)
+    data = stream.read(layout.itemsize * chunk.count)
+    return numpy.frombuffer(data, dtype=layout, count=clamp_chunk_count(chunk, layout, len(data)))
+
+
+def read_chunk_buffer(buffer: mmap.mmap | memoryview | bytes, chunk: Chunk) -> ndarray | None:
+    layout = get_chunk_layout(chunk)
+    if layout is None:
+        return None
+
+    offset = min(chunk.offset, len(buffer))
+    return numpy.frombuffer(buffer, dtype=layout, count=clamp_chunk_count(chunk, layout, len(buffer) - offset), offset=offset)
+
+
+def select_chunks(toc: list[Chunk], skip_chunks: set[str] | None) -> list[Chunk]:
+    # skip_chunks holds dispatch keys, so 'EXTRAUVS' skips every EXTRAUVS# chunk.
+    if not skip_chunks:
+        return toc
+
+    return [chunk for chunk in toc if chunk.key not in skip_chunks]
+
+
+def create_actorx(magic: str) -> Animation | AnimationV2 | Mesh | World | None:
     if magic == 'ACTRHEAD':
-        ob = Mesh()
+        return Mesh()
     elif magic == 'ANIXHEAD':
-        ob = AnimationV2()
+        return AnimationV2()
     elif magic == 'ANIMHEAD':
-        ob = Animation()
+        return Animation()
     elif magic == 'WRLDHEAD':
-        ob = World()
+        return World()
+    return None
+
+
+def get_compression(magic: bytes) -> str | None:
+    if magic.startswith(b'\x1f\x8b'):
+        return 'gzip'
+    elif magic.startswith(b'\xfd7zXZ\x00'):
+        return 'xz'
+    elif magic.startswith(b'\x28\xb5\x2f\xfd'):
+        return 'zstd'
+    return None
+
+
+# errors the decompressors raise for a cut off or damaged stream, gzip.BadGzipFile is an OSError.
+DECOMPRESSION_ERRORS: tuple[type[Exception], ...] = (EOFError, OSError, zlib.error, lzma.LZMAError) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+
+def open_decompressor(stream: typing.BinaryIO) -> typing.BinaryIO | None:
+    if hasattr(stream, 'peek'):
+        magic = stream.peek(6)[:6]
     else:
+        magic = stream.read(6)
+        stream.seek(-len(magic), 1)
+
+    compression = get_compression(magic)
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=stream, mode='rb')
+    elif compression == 'xz':
+        return lzma.LZMAFile(stream)
+    elif compression == 'zstd':
+        if zstandard is None:
+            log_error('ACTORX', 'File is zstd compressed but the zstandard module is not installed!')
+            return None
+        return zstandard.ZstdDecompressor().stream_reader(stream)
+    return None
+
+
+def read_into(stream: typing.BinaryIO, buffer: memoryview) -> int:
+    total = 0
+    while total < len(buffer):
+        count = stream.readinto(buffer[total:])
+        if not count:
+            break
+        total += count
+    return total
+
+
+def skip_bytes(stream: typing.BinaryIO, size: int) -> int:
+    scratch = memoryview(bytearray(min(size, 0x100000)))
+    total = 0
+    while total < size:
+        count = read_into(stream, scratch[:min(size - total, len(scratch))])
+        if count == 0:
+            break
+        total += count
+    return total
+
+
+def iter_stream_chunks(stream: typing.BinaryIO, wants_data: typing.Callable[[Chunk], bool]) -> typing.Iterator[tuple[Chunk, bytearray | None]]:
+    # walks the chunks of a stream without random access, after its 32 byte file header. chunks that aren't wanted
+    # are yielded without data and their payload is skipped over. a truncated chunk ends the walk.
+    header = bytearray(32)
+    offset = 32
+    chunk = None
+    try:
+        while read_into(stream, memoryview(header)) == 32:
+            chunk = create_chunk(*unpack_from('20s3i', header), offset + 32)
+            if chunk.size < 0 or chunk.count < 0:
+                log_error('ACTORX', 'Chunk %s is truncated!' % (chunk.id))
+                return
+
+            total_size = chunk.size * chunk.count
+            offset += 32 + total_size
+
+            if not wants_data(chunk):
+                if skip_bytes(stream, total_size) < total_size:
+                    log_error('ACTORX', 'Chunk %s is truncated!' % (chunk.id))
+                    return
+                yield (chunk, None)
+                continue
+
+            data = bytearray(total_size)
+            if read_into(stream, memoryview(data)) < total_size:
+                log_error('ACTORX', 'Chunk %s is truncated!' % (chunk.id))
+                return
+            yield (chunk, data)
+    except DECOMPRESSION_ERRORS as e:
+        # a cut off or damaged compressed file fails in the decompressor rather than as a short read.
+        log_error('ACTORX', 'Compressed data is truncated after chunk %s! (%s)' % (chunk.id if chunk is not None else 'header', e))
+
+
+def stream_chunks(stream: typing.BinaryIO, skip_chunks: set[str] | None, chunks: Queue, stop: Event):
+    # decompresses chunk by chunk into buffers sized from the chunk header, the decompressors release the gil
+    # so this overlaps with decoding on the reading thread.
+    def put(item: tuple[Chunk, bytearray | None] | Exception | None) -> bool:
+        # the reading thread may give up early, so never block on a full queue nobody drains.
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    try:
+        for item in iter_stream_chunks(stream, lambda chunk: chunk.key is not None and not (skip_chunks and chunk.key in skip_chunks)):
+            if not put(item):
+                return
+        put(None)
+    except Exception as e:
+        put(e)
+
+
+def read_actorx_compressed(stream: typing.BinaryIO, settings: dict[str, typing.Any], skip_chunks: set[str] | None = None) -> Animation | AnimationV2 | Mesh | World | None:
+    header = bytearray(32)
+    try:
+        if read_into(stream, memoryview(header)) < 32:
+            return None
+    except DECOMPRESSION_ERRORS as e:
+        log_error('ACTORX', 'Compressed data is truncated before the file header! (%s)' % (e))
         return None
-    stream.seek(0, 2)
-    size = stream.tell()
-    stream.seek(32, 0)
-    while stream.tell() < size:
-        (data, name) = read_chunk(stream)
+
+    ob = create_actorx(fix_string(unpack_from('20s', header, 0)[0]))
+    if ob is None:
+        return None
+
+    chunks: Queue = Queue(maxsize=8)
+    stop = Event()
+    thread = Thread(target=stream_chunks, args=(stream, skip_chunks, chunks, stop), daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = chunks.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+
+            (chunk, data) = item
+            if data is None:
+                if chunk.key is None:
+                    log_error('ACTORX', 'No parser found for %s!' % (chunk.id))
+                continue
+
+            layout = get_chunk_layout(chunk)
+            if layout is not None:
+                ob[chunk.key, chunk.index] = numpy.frombuffer(data, dtype=layout, count=chunk.count)
+    finally:
+        stop.set()
+        thread.join()
+
+    ob.finalize(settings)
+
+    return ob
+
+
+def map_stream(stream: typing.BinaryIO) -> mmap.mmap | None:
+    try:
+        return mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError):
+        # not backed by a real file, or an empty file (which can't be mapped.)
+        return None
+
+
+def read_actorx_buffer(buffer: mmap.mmap | memoryview | bytes, settings: dict[str, typing.Any], skip_chunks: set[str] | None = None) -> Animation | AnimationV2 | Mesh | World | None:
+    # every chunk is a view into the buffer rather than a copy, the returned object holds
+    # a reference to the buffer in Source so a mapped file stays mapped for as long as it lives.
+    (magic, toc) = read_toc_buffer(buffer)
+    ob = create_actorx(magic)
+    if ob is None:
+        return None
+
+    ob.Source = buffer
+    for chunk in select_chunks(toc, skip_chunks):
+        data = read_chunk_buffer(buffer, chunk)
+        if data is not None:
+            ob[chunk.key, chunk.index] = data
+
+    ob.finalize(settings)
+
+    return ob
+
+
+def read_actorx(stream: typing.BinaryIO, settings: dict[str, typing.Any], skip_chunks: set[str] | None = None) -> Animation | AnimationV2 | Mesh | World | None:
+    decompressor = open_decompressor(stream)
+    if decompressor is not None:
+        with decompressor:
+            return read_actorx_compressed(decompressor, settings, skip_chunks)
+
+    if 'use_mmap' not in settings or settings['use_mmap']:
+        buffer = map_stream(stream)
+        if buffer is not None:
+            return read_actorx_buffer(buffer, settings, skip_chunks)
+
+    (magic, toc) = read_toc(stream)
+    ob = create_actorx(magic)
+    if ob is None:
+        return None
+
+    for chunk in select_chunks(toc, skip_chunks):
+        data = read_chunk(stream, chunk)
         if data is not None:
-            ob[name] = data
+            ob[chunk.key, chunk.index] = data
 
     ob.finalize(settings)
 
     return ob
+
+
+def load_actorx(path: str, settings: dict[str, typing.Any], skip_chunks: set[str] | None = None) -> Animation | AnimationV2 | Mesh | World | None:
+    with open(path, 'rb') as stream:
+        return read_actorx(stream, settings, skip_chunks)
@@ -1,6 +1,7 @@
 import bpy
 
 from io_import_pskx.op import op_import_psa
+from io_import_pskx.op import op_import_psa_catalog
 from io_import_pskx.op import op_import_psk
 from io_import_pskx.op import op_import_psw
 
@@ -11,6 +12,7 @@ class actorx_menu(bpy.types.Menu):
     def draw(self, context):
         self.layout.operator(op_import_psk.op_import_psk.bl_idname, text='Mesh (.psk/.pskx)')
         self.layout.operator(op_import_psa.op_import_psa.bl_idname, text='Animation (.psa/.psax)')
+        self.layout.operator(op_import_psa_catalog.op_import_psa_catalog.bl_idname, text='Animation from Catalog')
         self.layout.operator(op_import_psw.op_import_psw.bl_idname, text='World (.psw)')
 
     @staticmethod
@@ -21,6 +23,7 @@ class actorx_menu(bpy.types.Menu):
 def register():
     bpy.utils.register_class(op_import_psk.op_import_psk)
     bpy.utils.register_class(op_import_psa.op_import_psa)
+    bpy.utils.register_class(op_import_psa_catalog.op_import_psa_catalog)
     bpy.utils.register_class(op_import_psw.op_import_psw)
     bpy.utils.register_class(actorx_menu)
     bpy.types.TOPBAR_MT_file_import.append(actorx_menu.menu_draw)
@@ -30,5 +33,6 @@ def unregister():
     bpy.utils.unregister_class(actorx_menu)
     bpy.utils.unregister_class(op_import_psk.op_import_psk)
     bpy.utils.unregister_class(op_import_psa.op_import_psa)
+    bpy.utils.unregister_class(op_import_psa_catalog.op_import_psa_catalog)
     bpy.utils.unregister_class(op_import_psw.op_import_psw)
     bpy.types.TOPBAR_MT_file_import.remove(actorx_menu.menu_draw)
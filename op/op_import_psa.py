@@ -1,7 +1,7 @@
 from typing import Union, Set
 
 import bpy
-from bpy.props import StringProperty, CollectionProperty, FloatProperty
+from bpy.props import StringProperty, CollectionProperty, FloatProperty, BoolProperty
 from bpy.types import Operator, Context, Property, OperatorFileListElement, TOPBAR_MT_file_import
 from bpy_extras.io_utils import ImportHelper
 from io_import_pskx.blend.psa import ActorXAnimation
@@ -12,7 +12,7 @@ class op_import_psa(Operator, ImportHelper):
     bl_label = 'Import ActorX PSA'
     bl_options = {'REGISTER', 'UNDO'}
 
-    filter_glob: StringProperty(default='*.psa;*.psax', options={'HIDDEN'})
+    filter_glob: StringProperty(default='*.psa;*.psax;*.psa.gz;*.psax.gz;*.psa.xz;*.psax.xz;*.psa.zst;*.psax.zst', options={'HIDDEN'})
 
     files: CollectionProperty(
             name='File Path',
@@ -27,6 +27,18 @@ class op_import_psa(Operator, ImportHelper):
             soft_max=10.0
     )
 
+    use_mmap: BoolProperty(
+            name='Memory Map',
+            description='Read files through a memory map instead of copying every chunk into memory',
+            default=True
+    )
+
+    use_cache: BoolProperty(
+            name='Cache',
+            description='Keep parsed files in an on-disk cache, later imports of an unchanged file skip parsing',
+            default=False
+    )
+
     def draw(self, context: Context):
         layout = self.layout
 
@@ -34,6 +46,8 @@ class op_import_psa(Operator, ImportHelper):
         layout.use_property_decorate = True
 
         layout.prop(self, 'resize_by')
+        layout.prop(self, 'use_mmap')
+        layout.prop(self, 'use_cache')
 
     def execute(self, context: Context) -> Union[Set[str], Set[int]]:
         import os
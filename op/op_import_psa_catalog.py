@@ -0,0 +1,118 @@
+import os
+from typing import Union, Set
+
+from bpy.props import StringProperty, EnumProperty, FloatProperty, BoolProperty
+from bpy.types import Operator, Context, Event, Property
+from io_import_pskx.blend.psa import ActorXAnimation
+from io_import_pskx.catalog import ActorXCatalog
+
+# catalogs stay loaded for the session, blender also requires the enum item strings to outlive the callback.
+catalogs: dict[str, ActorXCatalog] = {}
+catalog_items: dict[str, list[tuple[str, str, str]]] = {}
+
+
+def get_catalog(directory: str) -> ActorXCatalog:
+    if directory not in catalogs:
+        catalogs[directory] = ActorXCatalog(directory)
+    catalogs[directory].update()
+    catalog_items.pop(directory, None)
+    return catalogs[directory]
+
+
+def get_sequence_items(self, context: Context) -> list[tuple[str, str, str]]:
+    directory = self.directory
+    if directory not in catalogs:
+        return []
+
+    if directory not in catalog_items:
+        catalog_items[directory] = [(str(index), '%s (%s)' % (entry.name, entry.path), '%s, %d frames at %g fps, %d bones%s' % (entry.path, entry.num_frames, entry.frame_rate, entry.num_bones, ', additive' if entry.additive else '')) for index, entry in enumerate(catalogs[directory].entries)]
+    return catalog_items[directory]
+
+
+class op_import_psa_catalog(Operator):
+    bl_idname = 'import_animation.psa_catalog'
+    bl_label = 'Import ActorX PSA from Catalog'
+    bl_options = {'REGISTER', 'UNDO'}
+    bl_property = 'sequence'
+
+    directory: StringProperty(
+            name='Animation Directory',
+            description='Directory to catalog, the catalog is stored in it and only changed files are rescanned',
+            default='',
+            subtype='DIR_PATH'
+    )
+
+    sequence: EnumProperty(
+            name='Sequence',
+            items=get_sequence_items
+    )
+
+    resize_by: FloatProperty(
+            name='Scale',
+            description='Resize By',
+            default=0.01,
+            min=0.01,
+            soft_max=10.0
+    )
+
+    use_mmap: BoolProperty(
+            name='Memory Map',
+            description='Read files through a memory map instead of copying every chunk into memory',
+            default=True
+    )
+
+    use_cache: BoolProperty(
+            name='Cache',
+            description='Keep parsed files in an on-disk cache, later imports of an unchanged file skip parsing',
+            default=False
+    )
+
+    pick_sequence: BoolProperty(
+            default=False,
+            options={'HIDDEN', 'SKIP_SAVE'}
+    )
+
+    def draw(self, context: Context):
+        layout = self.layout
+
+        layout.use_property_split = True
+        layout.use_property_decorate = True
+
+        layout.prop(self, 'resize_by')
+        layout.prop(self, 'use_mmap')
+        layout.prop(self, 'use_cache')
+
+    def invoke(self, context: Context, event: Event) -> Union[Set[str], Set[int]]:
+        if self.pick_sequence:
+            context.window_manager.invoke_search_popup(self)
+        else:
+            context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context: Context) -> Union[Set[str], Set[int]]:
+        import bpy
+
+        if len(self.directory) == 0 or not os.path.isdir(self.directory):
+            self.report({'ERROR'}, 'Did not select an animation directory')
+            return {'CANCELLED'}
+
+        if not self.pick_sequence:
+            # the directory was just picked, scan it and show the sequences.
+            if len(get_catalog(self.directory)) == 0:
+                self.report({'ERROR'}, 'No animations found in %s' % (self.directory))
+                return {'CANCELLED'}
+            result = bpy.ops.import_animation.psa_catalog('INVOKE_DEFAULT', directory=self.directory, resize_by=self.resize_by, use_mmap=self.use_mmap, use_cache=self.use_cache, pick_sequence=True)
+            # the popup imports the picked sequence on its own, this run is done once the popup is showing.
+            if 'RUNNING_MODAL' in result or 'FINISHED' in result:
+                return {'FINISHED'}
+            return {'CANCELLED'}
+
+        if self.directory not in catalogs or len(self.sequence) == 0:
+            return {'CANCELLED'}
+
+        entry = catalogs[self.directory][int(self.sequence)]
+
+        settings: dict[str, Property] = self.as_keywords(ignore=('directory', 'sequence', 'pick_sequence'))
+        settings['sequence_id'] = entry.sequence_id
+
+        return ActorXAnimation(os.path.join(self.directory, entry.path), settings).execute(context)
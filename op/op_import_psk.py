@@ -1,7 +1,7 @@
 from typing import Union, Set
 
 import bpy
-from bpy.props import StringProperty, CollectionProperty, FloatProperty
+from bpy.props import StringProperty, CollectionProperty, FloatProperty, BoolProperty
 from bpy.types import Operator, Context, Property, OperatorFileListElement, TOPBAR_MT_file_import
 from bpy_extras.io_utils import ImportHelper
 from io_import_pskx.blend.psk import ActorXMesh
@@ -12,7 +12,7 @@ class op_import_psk(Operator, ImportHelper):
     bl_label = 'Import ActorX PSK'
     bl_options = {'REGISTER', 'UNDO'}
 
-    filter_glob: StringProperty(default='*.psk;*.pskx', options={'HIDDEN'})
+    filter_glob: StringProperty(default='*.psk;*.pskx;*.psk.gz;*.pskx.gz;*.psk.xz;*.pskx.xz;*.psk.zst;*.pskx.zst', options={'HIDDEN'})
 
     files: CollectionProperty(
             name='File Path',
@@ -27,6 +27,43 @@ class op_import_psk(Operator, ImportHelper):
             soft_max=10.0
     )
 
+    import_extra_uvs: BoolProperty(
+            name='Import Extra UVs',
+            description='When disabled, only the first UV map is imported',
+            default=True
+    )
+
+    weld_vertices: BoolProperty(
+            name='Weld Vertices',
+            description='Build the mesh from the shared points instead of one vertex per wedge, UVs and normals are kept per face corner',
+            default=False
+    )
+
+    import_morphs: BoolProperty(
+            name='Import Shape Keys',
+            description='When disabled, morph targets are skipped without being read',
+            default=True
+    )
+
+    reimport_selected: BoolProperty(
+            name='Reimport Into Selected',
+            description='Update the active mesh from the file, its data is rewritten in place unless the topology changed',
+            default=False,
+            options={'SKIP_SAVE'}
+    )
+
+    use_mmap: BoolProperty(
+            name='Memory Map',
+            description='Read files through a memory map instead of copying every chunk into memory',
+            default=True
+    )
+
+    use_cache: BoolProperty(
+            name='Cache',
+            description='Keep parsed files in an on-disk cache, later imports of an unchanged file skip parsing',
+            default=False
+    )
+
     def draw(self, context: Context):
         layout = self.layout
 
@@ -34,13 +71,19 @@ class op_import_psk(Operator, ImportHelper):
         layout.use_property_decorate = True
 
         layout.prop(self, 'resize_by')
+        layout.prop(self, 'import_extra_uvs')
+        layout.prop(self, 'weld_vertices')
+        layout.prop(self, 'import_morphs')
+        layout.prop(self, 'reimport_selected')
+        layout.prop(self, 'use_mmap')
+        layout.prop(self, 'use_cache')
 
     def execute(self, context: Context) -> Union[Set[str], Set[int]]:
         import os
 
         settings: dict[str, Property] = self.as_keywords()
 
-        if self.files:
+        if self.files and not self.reimport_selected:
             dirname = os.path.dirname(self.filepath)
             ret = {'CANCELLED'}
             for file in self.files:
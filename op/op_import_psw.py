@@ -33,7 +33,7 @@ class op_import_psw(Operator, ImportHelper):
     bl_label = 'Import ActorX PSW'
     bl_options = {'REGISTER', 'UNDO'}
 
-    filter_glob: StringProperty(default='*.psw', options={'HIDDEN'})
+    filter_glob: StringProperty(default='*.psw;*.psw.gz;*.psw.xz;*.psw.zst', options={'HIDDEN'})
 
     files: CollectionProperty(
             name='File Path',
@@ -48,6 +48,18 @@ class op_import_psw(Operator, ImportHelper):
             soft_max=10.0
     )
 
+    use_mmap: BoolProperty(
+            name='Memory Map',
+            description='Read files through a memory map instead of copying every chunk into memory',
+            default=True
+    )
+
+    use_cache: BoolProperty(
+            name='Cache',
+            description='Keep parsed files in an on-disk cache, later imports of an unchanged file skip parsing',
+            default=False
+    )
+
     adjust_intensity: FloatProperty(
             name='Light Power',
             description='Adjust Point Light Intensity By',
@@ -128,6 +140,18 @@ class op_import_psw(Operator, ImportHelper):
             default=True
     )
 
+    import_instance_morphs: BoolProperty(
+            name='Import Shape Keys',
+            description='When disabled, morph targets of static meshes are skipped without being read',
+            default=True
+    )
+
+    flatten_hierarchy: BoolProperty(
+            name='Flatten Static Actors',
+            description='Place static actors at their world transform without parenting them to other actors',
+            default=False
+    )
+
     use_actor_name: BoolProperty(
             name='Use Actor Names',
             description='If disabled, will use the mesh name instead of the actor name.',
@@ -141,6 +165,13 @@ class op_import_psw(Operator, ImportHelper):
             subtype='DIR_PATH'
     )
 
+    asset_pack: StringProperty(
+            name='Asset Pack',
+            description='ActorX pack built from the asset directory, assets are read from it instead of individual files',
+            default='',
+            subtype='FILE_PATH'
+    )
+
     def draw(self, context: Context):
         layout = self.layout
 
@@ -151,6 +182,8 @@ class op_import_psw(Operator, ImportHelper):
         layout.prop(self, 'import_landscape')
         layout.prop(self, 'import_light')
         layout.prop(self, 'resize_by')
+        layout.prop(self, 'use_mmap')
+        layout.prop(self, 'use_cache')
         layout.prop(self, 'adjust_intensity')
         layout.prop(self, 'adjust_area_intensity')
         layout.prop(self, 'adjust_spot_intensity')
@@ -160,8 +193,11 @@ class op_import_psw(Operator, ImportHelper):
         layout.prop(self, 'no_skeletons')
         layout.prop(self, 'ignore_shapes')
         layout.prop(self, 'ignore_lodactors')
+        layout.prop(self, 'flatten_hierarchy')
+        layout.prop(self, 'import_instance_morphs')
         layout.prop(self, 'use_actor_name')
         layout.prop(self, 'base_game_dir')
+        layout.prop(self, 'asset_pack')
 
     def execute(self, context: Context) -> Union[Set[str], Set[int]]:
         if len(self.base_game_dir) == 0:
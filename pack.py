@@ -0,0 +1,112 @@
+import io
+import mmap
+import os
+import shutil
+import typing
+from struct import pack, unpack_from
+
+from io_import_pskx.io import Animation, AnimationV2, Mesh, World, get_compression, read_actorx, read_actorx_buffer
+from io_import_pskx.utils import compressed_extensions, log_error, log_info
+
+# pack layout:
+#   header: char[20] magic, uint32 version, uint32 entry count, uint64 index offset
+#   data: every file stored as-is, aligned to 16 bytes
+#   index: per entry uint16 name length, char[] utf8 name, uint64 offset, uint64 size
+PACK_MAGIC: bytes = b'ACTXPACK'
+PACK_VERSION: int = 1
+PACK_HEADER: str = '<20sIIQ'
+PACK_HEADER_SIZE: int = 36
+PACK_ALIGNMENT: int = 16
+
+actorx_extensions: tuple[str, ...] = ('.psk', '.pskx', '.psa', '.psax', '.psw')
+
+
+def normalize_pack_name(name: str) -> str:
+    return name.replace('\\', '/').strip('/').lower()
+
+
+class ActorXPack:
+    path: str
+    buffer: mmap.mmap
+    entries: dict[str, tuple[int, int]]  # name = (offset, size)
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+
+        with open(path, 'rb') as stream:
+            self.buffer = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, count, index_offset) = unpack_from(PACK_HEADER, self.buffer, 0)
+        if magic.rstrip(b'\0') != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError('%s is not an ActorX pack' % (path))
+
+        offset = index_offset
+        for _ in range(count):
+            (name_length,) = unpack_from('<H', self.buffer, offset)
+            name = bytes(self.buffer[offset + 2:offset + 2 + name_length]).decode('utf8')
+            offset += 2 + name_length
+            self.entries[name] = unpack_from('<QQ', self.buffer, offset)
+            offset += 16
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_pack_name(name) in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def open(self, name: str) -> memoryview:
+        (offset, size) = self.entries[normalize_pack_name(name)]
+        return memoryview(self.buffer)[offset:offset + size]
+
+    def load(self, name: str, settings: dict[str, typing.Any], skip_chunks: set[str] | None = None) -> Animation | AnimationV2 | Mesh | World | None:
+        buffer = self.open(name)
+        if get_compression(bytes(buffer[:6])) is not None:
+            return read_actorx(io.BytesIO(buffer), settings, skip_chunks)
+
+        return read_actorx_buffer(buffer, settings, skip_chunks)
+
+
+def build_pack(pack_path: str, root_dir: str, extensions: tuple[str, ...] = actorx_extensions) -> int:
+    # stores every actorx file under root_dir, entries are named by their path relative to root_dir.
+    suffixes = tuple(extension + compressed_extension for extension in extensions for compressed_extension in ('',) + compressed_extensions)
+    files: list[tuple[str, str]] = []
+    for dir_path, _, file_names in os.walk(root_dir):
+        for file_name in file_names:
+            if file_name.lower().endswith(suffixes):
+                file_path = os.path.join(dir_path, file_name)
+                files.append((normalize_pack_name(os.path.relpath(file_path, root_dir)), file_path))
+    files.sort()
+
+    index: list[tuple[str, int, int]] = []
+    with open(pack_path, 'wb') as stream:
+        stream.write(bytes(PACK_HEADER_SIZE))
+        for (name, file_path) in files:
+            stream.write(bytes(-stream.tell() % PACK_ALIGNMENT))
+            offset = stream.tell()
+            with open(file_path, 'rb') as file_stream:
+                shutil.copyfileobj(file_stream, stream)
+            index.append((name, offset, stream.tell() - offset))
+
+        index_offset = stream.tell()
+        for (name, offset, size) in index:
+            encoded_name = name.encode('utf8')
+            stream.write(pack('<H', len(encoded_name)))
+            stream.write(encoded_name)
+            stream.write(pack('<QQ', offset, size))
+
+        stream.seek(0, 0)
+        stream.write(pack(PACK_HEADER, PACK_MAGIC, PACK_VERSION, len(index), index_offset))
+
+    log_info('PACK', 'Packed %d files into %s' % (len(index), pack_path))
+    return len(index)
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) != 3:
+        log_error('PACK', 'usage: python -m io_import_pskx.pack <asset directory> <output pack>')
+        sys.exit(1)
+
+    build_pack(sys.argv[2], sys.argv[1])
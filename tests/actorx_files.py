@@ -0,0 +1,90 @@
+from struct import pack
+
+import numpy
+from io_import_pskx.io import dispatch
+
+
+def make_chunk(chunk_id: str, data: numpy.ndarray) -> bytes:
+    return pack('20s3i', chunk_id.encode(), 0, data.dtype.itemsize, len(data)) + data.tobytes()
+
+
+def make_records(chunk_key: str, count: int) -> numpy.ndarray:
+    return numpy.zeros(count, dtype=dispatch[chunk_key][0])
+
+
+def make_psk(points: list[tuple[float, float, float]] | None = None,
+             wedges: list[int] | None = None,
+             faces: list[tuple[int, int, int]] | None = None,
+             num_materials: int = 2,
+             bones: list[tuple[str, int]] | None = None,
+             weights: list[tuple[float, int, int]] | None = None,
+             morphs: dict[str, list[tuple[int, tuple[float, float, float]]]] | None = None) -> bytes:
+    # a single triangle by default. bones are (name, parent id), weights (weight, point, bone), morphs wedge positions.
+    points = points if points is not None else [(0, 0, 0), (1, 0, 0), (0, 1, 0)]
+    wedges = wedges if wedges is not None else list(range(len(points)))
+    faces = faces if faces is not None else [(0, 1, 2)]
+
+    point_records = make_records('PNTS0000', len(points))
+    point_records['xyz'] = points
+    wedge_records = make_records('VTXW0000', len(wedges))
+    wedge_records['vertex_id'] = wedges
+    face_records = make_records('FACE0000', len(faces))
+    face_records['abc'] = faces
+    data = pack('20s3i', b'ACTRHEAD', 0, 0, 0) + make_chunk('PNTS0000', point_records) + make_chunk('VTXW0000', wedge_records) + make_chunk('FACE0000', face_records) + make_chunk('MATT0000', make_records('MATT0000', num_materials))
+
+    if bones is not None:
+        bone_records = make_records('REFSKELT', len(bones))
+        for bone_id, (bone_name, parent_id) in enumerate(bones):
+            bone_records['name'][bone_id, :len(bone_name)] = list(bone_name.encode())
+            bone_records['parent_id'][bone_id] = parent_id
+        bone_records['rot'] = (0, 0, 0, 1)
+        bone_records['scale'] = 1
+        data += make_chunk('REFSKELT', bone_records)
+
+    if weights is not None:
+        weight_records = make_records('RAWWEIGHTS', len(weights))
+        if len(weights) > 0:
+            weight_records['weight'] = [weight for weight, _, _ in weights]
+            weight_records['vertex_id'] = [point for _, point, _ in weights]
+            weight_records['bone_id'] = [bone for _, _, bone in weights]
+        data += make_chunk('RAWWEIGHTS', weight_records)
+
+    if morphs is not None:
+        name_records = make_records('MORPHNAMES', len(morphs))
+        for shape_id, (shape_name, shape_wedges) in enumerate(morphs.items()):
+            name_records['name'][shape_id, :len(shape_name)] = list(shape_name.encode())
+            shape_records = make_records('MORPHTARGET', len(shape_wedges))
+            shape_records['vertex_id'] = [wedge for wedge, _ in shape_wedges]
+            shape_records['xyz'] = [position for _, position in shape_wedges]
+            data += make_chunk('MORPHTARGET%d' % (shape_id), shape_records)
+        data += make_chunk('MORPHNAMES', name_records)
+
+    return data
+
+
+def make_psw(actors: list[tuple[str, str, int]],
+             overrides: list[tuple[int, int, str]] | None = None,
+             transforms: list[tuple[tuple[float, float, float], tuple[float, float, float, float], tuple[float, float, float]]] | None = None) -> bytes:
+    # actors are (name, asset, parent id), overrides (actor id, material id, name), transforms (position, xyzw rotation, scale.)
+    actor_records = make_records('WORLDACTORS', len(actors))
+    for actor_id, (actor_name, asset, parent_id) in enumerate(actors):
+        actor_records['name'][actor_id, :len(actor_name)] = list(actor_name.encode())
+        actor_records['asset'][actor_id, :len(asset)] = list(asset.encode())
+        actor_records['parent'][actor_id] = parent_id
+    actor_records['rot'] = (0, 0, 0, 1)
+    actor_records['scale'] = 1
+    if transforms is not None:
+        actor_records['pos'] = [position for position, _, _ in transforms]
+        actor_records['rot'] = [rotation for _, rotation, _ in transforms]
+        actor_records['scale'] = [scale for _, _, scale in transforms]
+    data = pack('20s3i', b'WRLDHEAD', 0, 0, 0) + make_chunk('WORLDACTORS', actor_records)
+
+    if overrides is not None:
+        override_records = make_records('INSTMATERIAL', len(overrides))
+        for override_id, (actor_id, material_id, material_name) in enumerate(overrides):
+            override_records['actor_id'][override_id] = actor_id
+            override_records['material_id'][override_id] = material_id
+            override_records['name'][override_id, :len(material_name)] = list(material_name.encode())
+        data += make_chunk('INSTMATERIAL', override_records)
+
+    return data
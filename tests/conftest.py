@@ -0,0 +1,11 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+# the repository root is the addon package, tests import it under the name blender installs it as.
+if 'io_import_pskx' not in sys.modules:
+    root = Path(__file__).parent.parent
+    spec = importlib.util.spec_from_file_location('io_import_pskx', root / '__init__.py', submodule_search_locations=[str(root)])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['io_import_pskx'] = module
+    spec.loader.exec_module(module)
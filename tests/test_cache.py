@@ -0,0 +1,72 @@
+import os
+import shutil
+
+import numpy
+from actorx_files import make_psk
+from io_import_pskx import cache
+from io_import_pskx.cache import ActorXCache, load_actorx_cached
+
+
+def write_psk(path, **kwargs) -> str:
+    path.write_bytes(make_psk(**kwargs))
+    return str(path)
+
+
+def test_round_trip(tmp_path, monkeypatch):
+    path = write_psk(tmp_path / 'mesh.psk', bones=[('root', -1), ('child', 0)], weights=[(1.0, 0, 0), (1.0, 1, 1), (1.0, 2, 1)])
+    settings = {'resize_by': 1.0, 'use_cache': True, 'cache_dir': str(tmp_path / 'cache')}
+    mesh = load_actorx_cached(path, settings)
+
+    # the second load has to come from the cache.
+    monkeypatch.setattr(cache, 'load_actorx', None)
+    cached = load_actorx_cached(path, settings)
+    assert cached is not mesh
+    assert cached.NumVertices == mesh.NumVertices
+    assert cached.Bones.Names == mesh.Bones.Names
+    assert numpy.array_equal(cached.Vertices, mesh.Vertices)
+    assert numpy.array_equal(cached.Faces, mesh.Faces)
+
+
+def test_key(tmp_path):
+    path = write_psk(tmp_path / 'mesh.psk')
+    key = ActorXCache.get_key(path, {'resize_by': 1.0, 'use_cache': True}, None)
+
+    # only settings that change the parsed result are part of the key.
+    assert ActorXCache.get_key(path, {'resize_by': 1.0}, None) == key
+    assert ActorXCache.get_key(path, {'resize_by': 0.01}, None) != key
+    assert ActorXCache.get_key(path, {'resize_by': 1.0}, {'MORPHTARGET'}) != key
+    assert ActorXCache.get_key(str(tmp_path / 'missing.psk'), {}, None) is None
+
+    write_psk(tmp_path / 'mesh.psk', num_materials=3)
+    assert ActorXCache.get_key(path, {'resize_by': 1.0}, None) != key
+
+
+def test_eviction(tmp_path):
+    meshes = [cache.load_actorx(write_psk(tmp_path / ('mesh%d.psk' % (mesh_id)), num_materials=mesh_id + 1), {}) for mesh_id in range(3)]
+    store = ActorXCache(str(tmp_path / 'cache'), max_size=0)
+    os.makedirs(store.cache_dir)
+
+    # a limit of zero evicts every entry right after it was written.
+    store.store('first', meshes[0])
+    assert store.get_entries() == []
+    assert store.total_size == 0
+
+    store.max_size = 1 << 30
+    store.store('first', meshes[2])
+    [(_, entry_size, _)] = store.get_entries()
+    assert entry_size > 0
+    shutil.rmtree(os.path.join(store.cache_dir, 'first'))
+    store.total_size = None
+
+    store.max_size = entry_size * 2 + 16
+    store.store('a', meshes[0])
+    store.store('b', meshes[1])
+    os.utime(os.path.join(store.cache_dir, 'a', cache.CACHE_META), (1, 1))
+    os.utime(os.path.join(store.cache_dir, 'b', cache.CACHE_META), (2, 2))
+    store.load('a')  # a was used last, so b is the oldest entry now.
+    store.store('c', meshes[2])
+
+    names = sorted(os.path.basename(directory) for _, _, directory in store.get_entries())
+    assert names == ['a', 'c']
+    assert store.total_size <= store.max_size
+    assert store.load('b') is None
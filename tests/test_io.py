@@ -0,0 +1,129 @@
+import gzip
+import lzma
+
+import numpy
+import pytest
+from actorx_files import make_psk
+from io_import_pskx.io import load_actorx
+
+
+@pytest.mark.parametrize('use_mmap', [True, False])
+def test_truncated_psk(tmp_path, use_mmap):
+    data = make_psk()
+    path = tmp_path / 'truncated.psk'
+    # cut into the material records, everything before them is intact.
+    path.write_bytes(data[:-100])
+
+    mesh = load_actorx(str(path), {'resize_by': 1.0, 'use_mmap': use_mmap})
+    assert mesh.NumVertices == 3
+    assert mesh.NumFaces == 1
+    assert mesh.Materials is None
+
+
+@pytest.mark.parametrize('use_mmap', [True, False])
+def test_complete_psk(tmp_path, use_mmap):
+    path = tmp_path / 'complete.psk'
+    path.write_bytes(make_psk())
+
+    mesh = load_actorx(str(path), {'resize_by': 1.0, 'use_mmap': use_mmap})
+    assert mesh.NumFaces == 1
+    assert mesh.NumMaterials == 2
+
+
+def load_psk(tmp_path, data: bytes, **settings):
+    path = tmp_path / 'mesh.psk'
+    path.write_bytes(data)
+    return load_actorx(str(path), {'resize_by': 1.0, **settings})
+
+
+def get_weights(mesh) -> dict[tuple[int, int], float]:
+    return {(bone_id, vertex_id): weight for bone_id, weight, vertex_ids in mesh.get_weight_groups() for vertex_id in vertex_ids.tolist()}
+
+
+BONES = [('root', -1), ('child', 0)]
+
+
+def test_weight_groups_empty(tmp_path):
+    assert load_psk(tmp_path, make_psk(bones=BONES, weights=[])).get_weight_groups() == []
+
+
+def test_weight_groups_zero_weights(tmp_path, capsys):
+    mesh = load_psk(tmp_path, make_psk(bones=BONES, weights=[(0.0, 0, 0), (0.0, 1, 1)]))
+    assert mesh.get_weight_groups() == []
+    assert 'missing' not in capsys.readouterr().out
+
+
+def test_weight_groups_duplicates(tmp_path):
+    mesh = load_psk(tmp_path, make_psk(bones=BONES, weights=[(0.25, 0, 1), (0.25, 0, 1), (1.0, 1, 0), (0.5, 2, 0), (0.5, 2, 1)]))
+    # weights are quantized to 16 bits.
+    assert get_weights(mesh) == pytest.approx({(1, 0): 0.5, (0, 1): 1.0, (0, 2): 0.5, (1, 2): 0.5}, abs=1 / 0xffff)
+
+
+def test_weight_groups_out_of_range(tmp_path, capsys):
+    mesh = load_psk(tmp_path, make_psk(bones=BONES, weights=[(1.0, 3, 0), (1.0, 0, 2), (1.0, -1, 0)]))
+    assert mesh.get_weight_groups() == []
+    assert '3 weights point to missing vertices or bones' in capsys.readouterr().out
+
+    mesh = load_psk(tmp_path, make_psk(bones=BONES, weights=[(1.0, 3, 0), (1.0, 1, 1)]))
+    assert get_weights(mesh) == {(1, 1): 1.0}
+
+
+# two triangles sharing an edge, wedges 1 and 3 as well as 2 and 4 are made from the same points.
+QUAD_POINTS = [(0, 0, 0), (1, 0, 0), (0, 1, 0), (1, 1, 0)]
+QUAD_WEDGES = [0, 1, 2, 1, 2, 3]
+QUAD_FACES = [(0, 1, 2), (3, 4, 5)]
+
+
+@pytest.mark.parametrize('weld_vertices', [False, True])
+def test_morph_targets_fold_onto_points(tmp_path, weld_vertices):
+    # wedge 1 and wedge 3 move point 1 to different places, the point takes their average.
+    mesh = load_psk(tmp_path, make_psk(QUAD_POINTS, QUAD_WEDGES, QUAD_FACES, morphs={'Smile': [(1, (1, 0, 2)), (3, (1, 0, 4))]}), weld_vertices=weld_vertices)
+    shape = mesh.expand_shape_key('Smile')
+    moved = numpy.flatnonzero(numpy.any(shape != mesh.Vertices, axis=1))
+    assert sorted(mesh.VertexPoints[moved].tolist()) == ([1, 1] if not weld_vertices else [1])
+    assert numpy.allclose(shape[moved], (1, 0, 3))
+
+
+@pytest.mark.parametrize('weld_vertices', [False, True])
+def test_weights_reach_every_vertex_of_a_point(tmp_path, weld_vertices):
+    mesh = load_psk(tmp_path, make_psk(QUAD_POINTS, QUAD_WEDGES, QUAD_FACES, bones=BONES, weights=[(1.0, 2, 1)]), weld_vertices=weld_vertices)
+    [(bone_id, weight, vertex_ids)] = mesh.get_weight_groups()
+    assert (bone_id, weight) == (1, 1.0)
+    assert mesh.VertexPoints[vertex_ids].tolist() == ([2, 2] if not weld_vertices else [2])
+
+
+def test_tracks_without_suffix_use_arrival_order(tmp_path):
+    from actorx_files import make_chunk, make_records
+    from struct import pack
+
+    bones = make_records('REFSKELT', 2)
+    bones['parent_id'] = (-1, 0)
+    sequences = make_records('SEQUENCES', 1)
+    sequences['framerate'] = 30
+    data = pack('20s3i', b'ANIXHEAD', 0, 0, 0) + make_chunk('REFSKELT', bones) + make_chunk('SEQUENCES', sequences)
+    for bone_id in range(2):
+        track = make_records('POSTRACK', bone_id + 1)
+        track['xyz'] = (bone_id, 0, 0)
+        data += make_chunk('POSTRACK', track)
+
+    path = tmp_path / 'animation.psax'
+    path.write_bytes(data)
+    animation = load_actorx(str(path), {'resize_by': 1.0})
+    assert animation.PosTracks[0].lengths().tolist() == [1, 2]
+    assert animation.PosTracks[0][1][1].tolist() == [[1, 0, 0], [1, 0, 0]]
+
+
+@pytest.mark.parametrize('compress', [gzip.compress, lzma.compress])
+def test_truncated_compressed_file(tmp_path, compress):
+    data = compress(make_psk(points=QUAD_POINTS, wedges=QUAD_WEDGES, faces=QUAD_FACES))
+    path = tmp_path / 'mesh.psk'
+
+    # cut into the file header.
+    path.write_bytes(data[:10])
+    assert load_actorx(str(path), {}) is None
+
+    # cut into the end of the stream, the decompressor fails after every chunk was read.
+    path.write_bytes(data[:-4])
+    mesh = load_actorx(str(path), {'resize_by': 1.0})
+    assert mesh.NumFaces == 2
+    assert mesh.NumMaterials == 2
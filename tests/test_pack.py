@@ -0,0 +1,35 @@
+import gzip
+
+import pytest
+from actorx_files import make_psk, make_psw
+from io_import_pskx.pack import ActorXPack, build_pack
+
+
+def test_round_trip(tmp_path):
+    assets = tmp_path / 'Game' / 'Meshes'
+    assets.mkdir(parents=True)
+    (assets / 'Rock.psk').write_bytes(make_psk(num_materials=1))
+    (assets / 'Tree.pskx.gz').write_bytes(gzip.compress(make_psk(num_materials=3)))
+    (tmp_path / 'Game' / 'Map.psw').write_bytes(make_psw([('Rock', '/Game/Meshes/Rock', -1)]))
+    (tmp_path / 'Game' / 'notes.txt').write_text('not an actorx file')
+
+    pack_path = str(tmp_path / 'assets.pack')
+    assert build_pack(pack_path, str(tmp_path)) == 3
+
+    pack = ActorXPack(pack_path)
+    assert len(pack) == 3
+    # names are matched case and separator insensitive, relative to the packed directory.
+    assert 'game\\meshes\\rock.psk' in pack
+    assert '/Game/Meshes/Tree.pskx.gz' in pack
+    assert 'game/notes.txt' not in pack
+
+    assert pack.load('Game/Meshes/Rock.psk', {'resize_by': 1.0}).NumMaterials == 1
+    assert pack.load('Game/Meshes/Tree.pskx.gz', {'resize_by': 1.0}).NumMaterials == 3
+    assert pack.load('Game/Map.psw', {}).ActorAssets == ['/Game/Meshes/Rock']
+
+
+def test_not_a_pack(tmp_path):
+    path = tmp_path / 'mesh.psk'
+    path.write_bytes(make_psk())
+    with pytest.raises(ValueError):
+        ActorXPack(str(path))
@@ -0,0 +1,56 @@
+import numpy
+import pytest
+from actorx_files import make_psw
+from io_import_pskx.io import load_actorx
+from io_import_pskx.transform import compose_matrices, quat_to_matrix, resolve_hierarchy
+from io_import_pskx.world import WorldPlan
+
+
+def make_matrix(position: tuple[float, float, float], rotation: tuple[float, float, float, float], scale: tuple[float, float, float]) -> numpy.ndarray:
+    # the reference for compose_matrices, built from separate translation, rotation and scale matrices.
+    translation = numpy.eye(4)
+    translation[:3, 3] = position
+    rotation_matrix = numpy.eye(4)
+    rotation_matrix[:3, :3] = quat_to_matrix(numpy.array(rotation, dtype=numpy.float64))
+    return translation @ rotation_matrix @ numpy.diag((*scale, 1.0))
+
+
+# (position, wxyz rotation, scale) of a root, its child and grandchild.
+CHAIN = [((1, 2, 3), (0.7071068, 0, 0, 0.7071068), (2, 2, 2)),
+         ((0, 1, 0), (0.7071068, 0.7071068, 0, 0), (1, 1, 1)),
+         ((4, 0, 0), (1, 0, 0, 0), (0.5, 1, 1))]
+
+
+def test_resolve_hierarchy():
+    expected = [make_matrix(*transform) for transform in CHAIN]
+    local = compose_matrices(numpy.array([position for position, _, _ in CHAIN], dtype=numpy.float32),
+                             numpy.array([rotation for _, rotation, _ in CHAIN], dtype=numpy.float32),
+                             numpy.array([scale for _, _, scale in CHAIN], dtype=numpy.float32))
+    assert local == pytest.approx(numpy.stack(expected), abs=1e-6)
+
+    # listed child first, so a level can't be resolved before its parent.
+    parents = numpy.array([1, 2, -1], dtype=numpy.int32)
+    world = resolve_hierarchy(parents, local[::-1].copy())
+    assert world[2] == pytest.approx(expected[0], abs=1e-6)
+    assert world[1] == pytest.approx(expected[0] @ expected[1], abs=1e-6)
+    assert world[0] == pytest.approx(expected[0] @ expected[1] @ expected[2], abs=1e-6)
+
+
+def test_world_transforms(tmp_path):
+    transforms = [(position, (x, y, z, w), scale) for position, (w, x, y, z), scale in CHAIN]
+    path = tmp_path / 'world.psw'
+    path.write_bytes(make_psw([('Root', '/Game/Root', -1), ('Group', 'None', 0), ('Leaf', '/Game/Leaf', 1)], transforms=transforms))
+    world = load_actorx(str(path), {'resize_by': 1.0})
+    plan = WorldPlan(world, {})
+    plan.ActorImport[1] = False
+
+    (basis, parents) = plan.get_transforms(world)
+    expected = [make_matrix(*transform) for transform in CHAIN]
+    # the leaf skips the group that isn't imported and keeps its world placement under the root.
+    assert parents[[0, 2]].tolist() == [-1, 0]
+    assert basis[0] == pytest.approx(expected[0], abs=1e-5)
+    assert basis[2] == pytest.approx(expected[1] @ expected[2], abs=1e-5)
+
+    (basis, parents) = plan.get_transforms(world, flatten_static=True)
+    assert parents[[0, 2]].tolist() == [-1, -1]
+    assert basis[2] == pytest.approx(expected[0] @ expected[1] @ expected[2], abs=1e-5)
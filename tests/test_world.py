@@ -0,0 +1,41 @@
+from actorx_files import make_psw
+from io_import_pskx.io import load_actorx
+from io_import_pskx.world import WorldPlan
+
+
+def load_psw(tmp_path, data: bytes, **settings):
+    path = tmp_path / 'world.psw'
+    path.write_bytes(data)
+    return load_actorx(str(path), {'resize_by': 1.0, **settings})
+
+
+ACTORS = [('Rock0', '/Game/Rock', -1), ('Rock1', '/Game/Rock', -1), ('Rock2', '/Game/Rock', -1), ('Tree', '/Game/Tree', -1)]
+
+
+def test_override_table(tmp_path):
+    world = load_psw(tmp_path, make_psw(ACTORS, [
+        (1, 1, 'Moss'),
+        (0, 0, 'Wet'),
+        (1, 0, 'Dry'),
+        (0, 0, 'Snow'),  # replaces Wet, the last override of a slot wins.
+        (7, 0, 'Missing'),
+        (-1, 0, 'Missing'),
+        (2, 0, 'Snow'),
+    ]))
+
+    assert world.OverrideOffsets.tolist() == [0, 1, 3, 4, 4]
+    assert world.get_override_key(0) == ((0, 'Snow'),)
+    assert world.get_override_key(1) == ((0, 'Dry'), (1, 'Moss'))
+    assert world.get_override_key(2) == ((0, 'Snow'),)
+    assert world.get_override_key(3) == ()
+
+
+def test_override_assets(tmp_path):
+    world = load_psw(tmp_path, make_psw(ACTORS, [(1, 0, 'Dry'), (0, 0, 'Snow'), (2, 0, 'Snow')]))
+    plan = WorldPlan(world, {})
+
+    # actors of one mesh only share an asset when their overrides match.
+    assert plan.Assets == ['/Game/Rock', '/Game/Rock', '/Game/Tree']
+    assert plan.AssetOverrides == [((0, 'Snow'),), ((0, 'Dry'),), ()]
+    assert plan.ActorAsset.tolist() == [0, 1, 0, 2]
+    assert plan.AssetFirstActor.tolist() == [0, 1, 3]
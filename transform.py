@@ -0,0 +1,101 @@
+import numpy
+from numpy import ndarray
+
+# quaternions are stored w-first (w, x, y, z) along the last axis, like mathutils.
+
+CONJUGATE: ndarray = numpy.array((1.0, -1.0, -1.0, -1.0), dtype=numpy.float32)
+
+
+def quat_multiply(a: ndarray, b: ndarray) -> ndarray:
+    (aw, ax, ay, az) = numpy.moveaxis(a, -1, 0)
+    (bw, bx, by, bz) = numpy.moveaxis(b, -1, 0)
+    return numpy.stack((aw * bw - ax * bx - ay * by - az * bz,
+                        aw * bx + ax * bw + ay * bz - az * by,
+                        aw * by - ax * bz + ay * bw + az * bx,
+                        aw * bz + ax * by - ay * bx + az * bw), axis=-1)
+
+
+def quat_conjugate(q: ndarray) -> ndarray:
+    return q * CONJUGATE
+
+
+def quat_canonical(q: ndarray) -> ndarray:
+    # mathutils returns rotations with a non-negative w when they round trip through a matrix.
+    return numpy.where(q[..., :1] < 0.0, -q, q)
+
+
+def quat_rotate_vector(q: ndarray, v: ndarray) -> ndarray:
+    w = q[..., :1]
+    xyz = q[..., 1:]
+    t = 2.0 * numpy.cross(xyz, v)
+    return v + w * t + numpy.cross(xyz, t)
+
+
+def quat_to_matrix(q: ndarray) -> ndarray:
+    # rotations are normalized first like blender does for object rotations.
+    q = q / numpy.linalg.norm(q, axis=-1, keepdims=True)
+    (w, x, y, z) = numpy.moveaxis(q, -1, 0)
+    return numpy.stack((numpy.stack((1.0 - 2.0 * (y * y + z * z), 2.0 * (x * y - w * z), 2.0 * (x * z + w * y)), axis=-1),
+                        numpy.stack((2.0 * (x * y + w * z), 1.0 - 2.0 * (x * x + z * z), 2.0 * (y * z - w * x)), axis=-1),
+                        numpy.stack((2.0 * (x * z - w * y), 2.0 * (y * z + w * x), 1.0 - 2.0 * (x * x + y * y)), axis=-1)), axis=-2)
+
+
+def compose_matrices(pos: ndarray, rot: ndarray, scale: ndarray) -> ndarray:
+    # float64 (count, 4, 4) = translation @ rotation @ scale, the same order as an object's loc/rot/scale.
+    matrices: ndarray = numpy.zeros((len(pos), 4, 4), dtype=numpy.float64)
+    matrices[:, :3, :3] = quat_to_matrix(rot.astype(numpy.float64)) * scale.astype(numpy.float64)[:, numpy.newaxis, :]
+    matrices[:, :3, 3] = pos
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+def matrix_to_bone(matrices: ndarray, length: float) -> tuple[ndarray, ndarray, ndarray]:
+    # edit bone heads, tails and rolls of (count, 4, 4) matrices, the same values assigning EditBone.matrix gives.
+    axes: ndarray = matrices[:, :3, :3] / numpy.linalg.norm(matrices[:, :3, :3], axis=1, keepdims=True)
+    (x, y, z) = numpy.moveaxis(axes[:, :, 1], -1, 0)
+
+    # the zero roll basis around the bone axis, from blender's vec_roll_to_mat3_normalized.
+    theta: ndarray = 1.0 + y
+    theta_alt: ndarray = x * x + z * z
+    singular: ndarray = (theta <= 6.1e-3) & (theta_alt <= 2.5e-4 * 2.5e-4)
+    theta = numpy.where(theta > 6.1e-3, theta, theta_alt * 0.5 + theta_alt * theta_alt * 0.125)
+    theta[singular] = 1.0
+    basis_x: ndarray = numpy.stack((1.0 - x * x / theta, -x, -x * z / theta), axis=-1)
+    basis_z: ndarray = numpy.stack((-x * z / theta, -z, 1.0 - z * z / theta), axis=-1)
+    basis_x[singular] = numpy.stack((-numpy.ones_like(x), -x, numpy.zeros_like(x)), axis=-1)[singular]
+    basis_z[singular] = numpy.stack((numpy.zeros_like(z), -z, numpy.ones_like(z)), axis=-1)[singular]
+
+    axis_z: ndarray = axes[:, :, 2]
+    rolls: ndarray = numpy.arctan2(numpy.sum(basis_x * axis_z, axis=-1), numpy.sum(basis_z * axis_z, axis=-1))
+    heads: ndarray = matrices[:, :3, 3]
+    return (heads, heads + axes[:, :, 1] * length, rolls)
+
+
+def get_depths(parents: ndarray) -> ndarray:
+    # hierarchy depth of every node by pointer jumping, -1 for nodes in (or below) a parent cycle.
+    count = len(parents)
+    valid: ndarray = (parents >= 0) & (parents < count)
+    ancestors: ndarray = numpy.where(valid, parents, -1)
+    depths: ndarray = valid.astype(numpy.int64)
+    for _ in range(max(count, 1).bit_length() + 1):
+        active = numpy.flatnonzero(ancestors >= 0)
+        if len(active) == 0:
+            return depths
+        active_ancestors = ancestors[active]
+        depths[active] += depths[active_ancestors]
+        ancestors[active] = ancestors[active_ancestors]
+
+    depths[ancestors >= 0] = -1
+    return depths
+
+
+def resolve_hierarchy(parents: ndarray, local: ndarray) -> ndarray:
+    # world matrices resolved one hierarchy level at a time, every level is a single batched product.
+    depths: ndarray = get_depths(parents)
+    world: ndarray = local.copy()
+    order: ndarray = numpy.argsort(depths, kind='stable')
+    levels: ndarray = numpy.searchsorted(depths[order], numpy.arange(1, depths.max(initial=0) + 2))
+    for start, end in zip(levels[:-1].tolist(), levels[1:].tolist()):
+        nodes = order[start:end]
+        world[nodes] = world[parents[nodes]] @ local[nodes]
+    return world
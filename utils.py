@@ -1,8 +1,10 @@
-import bpy
+from os.path import basename, splitext
+
 import numpy
-from bpy.types import Context, Object
 from numpy import ndarray
 
+compressed_extensions: tuple[str, ...] = ('.gz', '.xz', '.zst')
+
 
 def fix_string(string: str) -> str:
     return string.rstrip(b'\0').decode(errors='replace', encoding='utf8')
@@ -11,6 +13,26 @@ def fix_string(string: str) -> str:
 def fix_string_np(string: ndarray) -> str:
     return numpy.trim_zeros(string).tobytes().decode(errors='replace', encoding='utf8')
 
+
+def fix_strings_np(strings: ndarray) -> list[str]:
+    # decodes a (count, length) byte column, every distinct string is decoded once.
+    if len(strings) == 0:
+        return []
+
+    raw: ndarray = numpy.ascontiguousarray(strings).view('S%d' % (strings.shape[-1]))[:, 0]
+    (unique, inverse) = numpy.unique(raw, return_inverse=True)
+    decoded = [string.decode(errors='replace', encoding='utf8') for string in unique.tolist()]
+    return [decoded[index] for index in inverse.ravel().tolist()]
+
+
+def get_asset_name(path: str) -> str:
+    name = basename(path)
+    for extension in compressed_extensions:
+        if name.endswith(extension):
+            name = name[:-len(extension)]
+            break
+    return splitext(name)[0]
+
 INFO = u"\u001b[35m"
 ERROR = u"\u001b[31m"
 WARNING = u"\u001b[33m"
@@ -0,0 +1,152 @@
+import typing
+from os.path import basename
+
+import numpy
+from io_import_pskx.io import World
+from io_import_pskx.transform import compose_matrices, get_depths, resolve_hierarchy
+from io_import_pskx.utils import log_error
+from numpy import ndarray
+
+ignore_names = ['CUBE', 'SPHERE', 'CONE', 'CYLINDER', 'CAPSULE', 'BOX', 'ARROW', 'SPLINE', 'PLANE']
+
+
+def is_ignored_name(path: str) -> bool:
+    test = basename(path).split('.')[0].upper()
+    if test.startswith('SM_'):
+        test = test[3:]
+    elif test.startswith('SHAPE_'):
+        test = test[6:]
+    elif test.startswith('1M_'):
+        test = test[3:].split('_')[0]
+    if 'VFX_' in test: return True
+    return test in ignore_names
+
+
+def is_lodactor_or_hlod(path: str) -> bool:
+    test = basename(path).split('.')[0].upper()
+    return 'LODACTOR_' in test or '_HLOD_' in test
+
+
+def classify_strings(strings: list[str], predicate: typing.Callable[[str], bool]) -> ndarray:
+    # maps share a handful of names and assets between many actors, so each distinct string is tested once.
+    results = {string: predicate(string) for string in set(strings)}
+    return numpy.fromiter((results[string] for string in strings), dtype=bool, count=len(strings))
+
+
+def get_override_groups(world: World) -> ndarray:
+    # int64 (actors,) id shared by actors with the same material overrides, 0 for actors without any.
+    groups: ndarray = numpy.zeros(world.NumActors, dtype=numpy.int64)
+    counts: ndarray = numpy.diff(world.OverrideOffsets)
+    actors: ndarray = numpy.flatnonzero(counts > 0)
+    if len(actors) == 0:
+        return groups
+
+    # every override becomes one code, each actor one row of codes padded with -1. overrides are sorted by
+    # material id, so equal override sets give equal rows.
+    (names, name_ids) = numpy.unique(numpy.array(world.OverrideNames), return_inverse=True)
+    codes: ndarray = world.OverrideMaterialIds.astype(numpy.int64) * len(names) + name_ids.ravel()
+    rows: ndarray = numpy.full((len(actors), counts.max()), -1, dtype=numpy.int64)
+    record_rows: ndarray = numpy.repeat(numpy.arange(len(actors)), counts[actors])
+    record_columns: ndarray = numpy.arange(len(codes)) - world.OverrideOffsets[actors][record_rows]
+    rows[record_rows, record_columns] = codes
+
+    (_, row_groups) = numpy.unique(rows, axis=0, return_inverse=True)
+    groups[actors] = row_groups.ravel() + 1
+    return groups
+
+
+class WorldPlan:
+    NumActors: int
+    NumAssets: int
+
+    ActorImport: ndarray  # bool (actors,), the actor gets an object
+    ActorIsStatic: ndarray  # bool (actors,), instanced from the shared collection of its asset
+    ActorAsset: ndarray  # int32 (actors,), -1 for actors without a mesh
+
+    Assets: list[str]  # game path of every distinct (asset, overrides) pair
+    AssetPaths: list[str]  # game path relative to the asset directory
+    AssetOverrides: list[tuple[tuple[int, str], ...]]
+    AssetFirstActor: ndarray  # int32 (assets,)
+    AssetIsStatic: ndarray  # bool (assets,), used by at least one static actor
+
+    def __init__(self, world: World, settings: dict[str, typing.Any]):
+        ignore_shapes: bool = settings['ignore_shapes'] if 'ignore_shapes' in settings else False
+        ignore_lodactors: bool = settings['ignore_lodactors'] if 'ignore_lodactors' in settings else False
+        no_skeletons: bool = settings['no_skeletons'] if 'no_skeletons' in settings else False
+        no_static_instances: bool = settings['no_static_instances'] if 'no_static_instances' in settings else False
+        import_mesh: bool = settings['import_mesh'] if 'import_mesh' in settings else True
+
+        self.NumActors = world.NumActors
+        self.ActorImport = numpy.ones(self.NumActors, dtype=bool)
+        if ignore_shapes:
+            self.ActorImport &= ~classify_strings(world.ActorNames, is_ignored_name)
+        if ignore_lodactors:
+            self.ActorImport &= ~classify_strings(world.ActorNames, is_lodactor_or_hlod)
+        if no_skeletons:
+            self.ActorImport &= world.ActorIsStatic
+
+        self.ActorIsStatic = world.ActorIsStatic & (not no_static_instances)
+
+        has_asset: ndarray = classify_strings(world.ActorAssets, lambda asset: asset != 'None') & import_mesh
+        if ignore_shapes:
+            self.ActorImport &= ~(has_asset & classify_strings(world.ActorAssets, is_ignored_name))
+        if ignore_lodactors:
+            self.ActorImport &= ~(has_asset & classify_strings(world.ActorAssets, is_lodactor_or_hlod))
+
+        # an asset is a distinct (mesh, overrides) pair, numbered in the order of the first actor using it.
+        mesh_actors: ndarray = numpy.flatnonzero(self.ActorImport & has_asset)
+        # actors of the same asset share one decoded string, numbering them through a dict avoids copying every path.
+        asset_ids: dict[str, int] = {}
+        mesh_ids: ndarray = numpy.fromiter((asset_ids.setdefault(asset, len(asset_ids)) for asset in world.ActorAssets), dtype=numpy.int64, count=len(world.ActorAssets))
+        override_groups: ndarray = get_override_groups(world)
+        keys: ndarray = mesh_ids * (override_groups.max(initial=0) + 1) + override_groups
+        (_, first_actors, actor_keys) = numpy.unique(keys[mesh_actors], return_index=True, return_inverse=True)
+        key_order: ndarray = numpy.argsort(first_actors, kind='stable')
+        key_assets: ndarray = numpy.empty(len(key_order), dtype=numpy.int32)
+        key_assets[key_order] = numpy.arange(len(key_order), dtype=numpy.int32)
+
+        self.ActorAsset = numpy.full(self.NumActors, -1, dtype=numpy.int32)
+        self.ActorAsset[mesh_actors] = key_assets[actor_keys.ravel()]
+        self.AssetFirstActor = mesh_actors[first_actors[key_order]].astype(numpy.int32)
+
+        self.NumAssets = len(self.AssetFirstActor)
+        self.Assets = [world.ActorAssets[actor_id] for actor_id in self.AssetFirstActor.tolist()]
+        self.AssetOverrides = [world.get_override_key(actor_id) if override_groups[actor_id] > 0 else () for actor_id in self.AssetFirstActor.tolist()]
+        self.AssetPaths = [asset.strip('/').strip('\\') for asset in self.Assets]
+        self.AssetIsStatic = numpy.zeros(self.NumAssets, dtype=bool)
+        static_actors: ndarray = self.ActorImport & self.ActorIsStatic & (self.ActorAsset >= 0)
+        self.AssetIsStatic[self.ActorAsset[static_actors]] = True
+
+    def get_actor_ids(self) -> ndarray:
+        return numpy.flatnonzero(self.ActorImport)
+
+    def get_transforms(self, world: World, flatten_static: bool = False) -> tuple[ndarray, ndarray]:
+        # returns the float64 (actors, 4, 4) matrix_basis and the int32 (actors,) parent object of every actor.
+        # actors are parented to their closest imported ancestor, or to nothing when static hierarchies are flattened.
+        depths: ndarray = get_depths(world.ActorParents)
+        if numpy.any(depths < 0):
+            log_error('WORLD', '%d actors have cyclic parents!' % (numpy.count_nonzero(depths < 0)))
+
+        matrices: ndarray = resolve_hierarchy(world.ActorParents, compose_matrices(world.ActorPositions, world.ActorRotations, world.ActorScales))
+
+        actor_parents: ndarray = numpy.where((depths > 0), world.ActorParents, -1).astype(numpy.int32)
+        parents: ndarray = actor_parents.copy()
+        while True:
+            skipped = numpy.flatnonzero(parents >= 0)
+            skipped = skipped[~self.ActorImport[parents[skipped]]]
+            if len(skipped) == 0:
+                break
+            parents[skipped] = actor_parents[parents[skipped]]
+
+        if flatten_static:
+            parents[self.ActorIsStatic] = -1
+
+        basis: ndarray = matrices.copy()
+        children: ndarray = numpy.flatnonzero(parents >= 0)
+        try:
+            inverse: ndarray = numpy.linalg.inv(matrices[parents[children]])
+        except numpy.linalg.LinAlgError:
+            # zero scaled parents.
+            inverse: ndarray = numpy.linalg.pinv(matrices[parents[children]])
+        basis[children] = inverse @ matrices[children]
+        return (basis, parents)